@@ -0,0 +1,83 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Microbenchmark of the origin/development axis derivation for monthly
+(OMDM) triangles.  The closed-form axes are compared against the previous
+cartesian product approach on time and peak traced memory.
+
+Usage::
+
+    python benchmarks/date_axes.py --years 20
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import chainladder as cl
+from triangle_construction import profile
+
+
+def monthly_data(years):
+    """ A full monthly triangle of ``years`` origin years """
+    months = pd.period_range('2000-01', periods=12*years, freq='M')
+    origin, development = np.triu_indices(len(months))
+    return pd.DataFrame({
+        'origin': months[origin].strftime('%Y-%m'),
+        'development': months[development].strftime('%Y-%m'),
+        'loss': 1.})
+
+
+def legacy_axes(tri, origin_date, development_date):
+    """ The DataFrame cartesian product the constructor previously used to
+    find every valid origin/development pair. """
+    def complete_date_range(origin_date, development_date):
+        origin_unique = pd.period_range(
+            start=origin_date.min(),
+            end=max(origin_date.max(), tri.valuation_date),
+            freq=tri.origin_grain).to_timestamp()
+        development_unique = pd.period_range(
+            start=origin_date.min(), end=development_date.max(),
+            freq=tri.development_grain).to_timestamp(how='e')
+        arr = np.array(np.meshgrid(origin_unique, development_unique,
+                                   indexing='ij')).reshape(2, -1).T
+        arr = arr[arr[:, 0] <= arr[:, 1], :]
+        return pd.DataFrame(arr, columns=['origin', 'development'])
+    cart_prod = pd.concat((
+        complete_date_range(pd.Series(origin_date.min()), development_date),
+        complete_date_range(origin_date, pd.Series(origin_date.max())),
+        pd.DataFrame({'origin': origin_date,
+                      'development': development_date}))).drop_duplicates()
+    cart_prod = cart_prod[cart_prod['development'] >= cart_prod['origin']]
+    lag = (cart_prod['development'].dt.year -
+           cart_prod['origin'].dt.year) * 12 + \
+        cart_prod['development'].dt.month - cart_prod['origin'].dt.month + 1
+    return np.sort(cart_prod['origin'].unique()), np.sort(lag.unique())
+
+
+def main(years=20):
+    data = monthly_data(years)
+    tri = cl.Triangle(data, origin='origin', development='development',
+                      columns='loss')
+    origin_date = pd.to_datetime(data['origin'])
+    development_date = pd.Series(pd.PeriodIndex(
+        data['development'], freq='M').to_timestamp(how='e'))
+    current = tri._get_date_axes(origin_date, development_date)
+    legacy = legacy_axes(tri, origin_date, development_date)
+    assert all(np.array_equal(*item) for item in zip(current, legacy))
+    rows = []
+    for label, func, args in [
+            ('current', tri._get_date_axes, (origin_date, development_date)),
+            ('legacy', legacy_axes, (tri, origin_date, development_date)),
+            ('construction', cl.Triangle, (data, 'origin', 'development',
+                                           'loss'))]:
+        elapsed, peak = profile(func, *args)
+        rows.append((label, len(data), elapsed, peak))
+    return pd.DataFrame(rows, columns=['path', 'rows', 'seconds', 'peak_mb'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--years', type=int, default=20)
+    print(main(parser.parse_args().years).to_string(index=False))
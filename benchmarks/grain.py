@@ -0,0 +1,79 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of ``Triangle.grain`` converting a monthly triangle to coarser
+grains.  Origins are summed as contiguous blocks and lags taken with a
+strided slice; these are compared against the previous approach, reproduced
+here as ``legacy_grain``, that broadcast the values against an origin by new
+origin mask.
+
+Usage::
+
+    python benchmarks/grain.py --months 240 --segments 10
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from triangle_construction import profile
+from val_dev_change import monthly
+
+
+def legacy_grain(tri, grain):
+    """ Triangle.grain with the previous origin and development regraining
+    of a cumulative development triangle """
+    obj = tri.dev_to_val()
+    o_dt = pd.Series(obj.odims)
+    if grain[1] == 'Q':
+        o = np.array(pd.to_datetime(
+            o_dt.dt.year.astype(str) + 'Q' + o_dt.dt.quarter.astype(str)))
+    else:
+        o = np.array(pd.to_datetime(o_dt.dt.year, format='%Y'))
+    o_new = np.unique(o)
+    o = np.repeat(np.expand_dims(o, axis=1), len(o_new), axis=1)
+    o_new = np.repeat(o_new[np.newaxis], len(o), axis=0)
+    o_bool = np.repeat((o == o_new)[:, np.newaxis], len(obj.ddims), axis=1)
+    o_bool = obj._expand_dims(o_bool)
+    new_tri = np.repeat(np.nan_to_num(obj.values)[..., np.newaxis],
+                        o_bool.shape[-1], axis=-1)
+    new_tri[~np.isfinite(new_tri)] = 0
+    obj.values = np.swapaxes(np.sum(new_tri*o_bool, axis=2), -1, -2)
+    obj.odims = np.unique(o)
+    obj._reset_valuation()
+    obj.__dict__.pop('_nan_triangle_', None)
+    obj = obj.val_to_dev()
+    keeps = {'Y': 12, 'Q': 3, 'M': 1}[grain[-1]]
+    keeps = np.where(np.arange(obj.shape[3]) % keeps == 0)[0]
+    keeps = -(keeps + 1)[::-1]
+    obj.values = obj.values[..., keeps]
+    obj.ddims = obj.ddims[keeps]
+    obj.origin_grain, obj.development_grain = grain[1], grain[-1]
+    obj._nan_zeros()
+    obj._reset_valuation()
+    obj.__dict__.pop('_nan_triangle_', None)
+    return obj
+
+
+def main(months=240, segments=10):
+    tri = monthly(months, segments)
+    rows = []
+    for grain in ['OQDQ', 'OYDQ', 'OYDY']:
+        np.testing.assert_allclose(tri.grain(grain).values,
+                                   legacy_grain(tri, grain).values)
+        for label, func in [('segment sum', tri.grain),
+                            ('legacy broadcast', lambda x: legacy_grain(
+                                tri, x))]:
+            elapsed, peak = profile(func, grain)
+            rows.append((grain, label, tri.shape, elapsed, peak))
+    return pd.DataFrame(rows, columns=['grain', 'path', 'shape', 'seconds',
+                                       'peak_mb'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--months', type=int, default=240)
+    parser.add_argument('--segments', type=int, default=10)
+    args = parser.parse_args()
+    print(main(args.months, args.segments).to_string(index=False))
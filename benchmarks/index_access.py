@@ -0,0 +1,62 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of index access on a triangle with many policy level segments.
+The index cached from the integer codes of each level is compared against
+rebuilding a DataFrame from the materialized keys, as ``Triangle.index``
+previously did on every access.
+
+Usage::
+
+    python benchmarks/index_access.py --segments 100000
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import chainladder as cl
+from triangle_construction import profile
+
+
+def policy_data(segments, years=3):
+    """ A ``years`` annual triangle for each of ``segments`` policies spread
+    over a handful of lines of business """
+    origin, lag = np.triu_indices(years)
+    policy = np.char.add('P', np.arange(segments).astype(str))
+    return pd.DataFrame({
+        'policy': np.repeat(policy, len(origin)),
+        'lob': np.repeat(np.array(['auto', 'home', 'liab', 'wc'])[
+            np.arange(segments) % 4], len(origin)),
+        'origin': np.tile(2000 + origin, segments),
+        'development': np.tile(2000 + lag, segments),
+        'loss': 1.})
+
+
+def legacy_index(tri):
+    return pd.DataFrame(list(tri.kdims), columns=tri.key_labels)
+
+
+def main(segments=100000):
+    tri = cl.Triangle(policy_data(segments), origin='origin',
+                      development='development', index=['policy', 'lob'],
+                      columns='loss')
+    assert legacy_index(tri).equals(tri.index)
+    rows = []
+    for label, func in [
+            ('index', lambda: tri.index),
+            ('legacy index', lambda: legacy_index(tri)),
+            ('filter', lambda: tri.index['lob'] == 'wc'),
+            ('legacy filter', lambda: legacy_index(tri)['lob'] == 'wc'),
+            ('groupby sum', lambda: tri.groupby('lob').sum())]:
+        elapsed, peak = profile(func)
+        rows.append((label, segments, elapsed, peak))
+    return pd.DataFrame(rows, columns=['path', 'segments', 'seconds',
+                                       'peak_mb'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--segments', type=int, default=100000)
+    print(main(parser.parse_args().segments).to_string(index=False))
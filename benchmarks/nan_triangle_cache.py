@@ -0,0 +1,70 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of building the NaN triangle masks of the individual segments of a
+triangle with many same-shaped index segments, as estimators fit to each
+segment do.  Masks shared through the process-wide mask cache are compared
+against rebuilding the mask for every segment, as before.
+
+Usage::
+
+    python benchmarks/nan_triangle_cache.py --segments 1000 --years 40
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import chainladder as cl
+from chainladder.core.base import _nan_triangle_cache
+from triangle_construction import profile
+
+
+def synthetic(segments, years=10):
+    """ An annual triangle of ``years`` origins for each of ``segments``
+    index keys """
+    origin, lag = np.triu_indices(years)
+    data = pd.DataFrame({
+        'segment': np.repeat(np.arange(segments), len(origin)),
+        'origin': np.tile(1990 + origin, segments),
+        'development': np.tile(1990 + lag, segments),
+        'loss': np.random.RandomState(0).lognormal(
+            10, 1, segments * len(origin))})
+    return cl.Triangle(data, origin='origin', development='development',
+                       index='segment', columns='loss')
+
+
+def segment_masks(segments, shared=True):
+    masks = []
+    for segment in segments:
+        if not shared:
+            _nan_triangle_cache.cache_clear()
+        segment.__dict__.pop('_nan_triangle_', None)
+        masks.append(segment._nan_triangle())
+    return masks
+
+
+def main(segments=1000, years=40):
+    tri = synthetic(segments, years)
+    segments = [tri.iloc[num] for num in range(segments)]
+    rows = []
+    for label, shared in [('shared masks', True), ('per segment', False)]:
+        _nan_triangle_cache.cache_clear()
+        elapsed, peak = profile(segment_masks, segments, shared)
+        masks = segment_masks(segments, shared)
+        distinct = len(set(id(item) for item in masks))
+        hits, misses = _nan_triangle_cache.cache_info()[:2]
+        rows.append((label, len(segments), elapsed, peak, distinct, hits,
+                     misses))
+    return pd.DataFrame(rows, columns=['path', 'segments', 'seconds',
+                                       'peak_mb', 'distinct_masks', 'hits',
+                                       'misses'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--segments', type=int, default=1000)
+    parser.add_argument('--years', type=int, default=40)
+    args = parser.parse_args()
+    print(main(args.segments, args.years).to_string(index=False))
@@ -0,0 +1,55 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of packed Triangle storage on a monthly (OMDM) triangle repeated
+over many index segments.  Construction time, peak traced memory and the
+size of the stored values are compared against the full rectangle.
+
+Usage::
+
+    python benchmarks/packed_storage.py --years 10 --segments 100
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import chainladder as cl
+from date_axes import monthly_data
+from triangle_construction import profile
+
+
+def segmented_data(years, segments):
+    """ A full monthly triangle for each of ``segments`` index keys """
+    data = monthly_data(years)
+    return pd.DataFrame({
+        'segment': np.repeat(np.arange(segments), len(data)),
+        'origin': np.tile(data['origin'].values, segments),
+        'development': np.tile(data['development'].values, segments),
+        'loss': 1.})
+
+
+def main(years=10, segments=100):
+    data = segmented_data(years, segments)
+    rows = []
+    for packed in [False, True]:
+        kwargs = dict(origin='origin', development='development',
+                      index='segment', columns='loss', packed=packed)
+        elapsed, peak = profile(cl.Triangle, data, **kwargs)
+        tri = cl.Triangle(data, **kwargs)
+        stored = tri._packed if packed else tri.values
+        subtotal = tri.iloc[::2].sum() * 1.05
+        rows.append((packed, tri.shape, elapsed, peak, stored.nbytes / 2**20,
+                     subtotal.is_packed))
+    return pd.DataFrame(rows, columns=['packed', 'shape', 'seconds',
+                                       'peak_mb', 'stored_mb',
+                                       'subtotal_packed'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--years', type=int, default=10)
+    parser.add_argument('--segments', type=int, default=100)
+    args = parser.parse_args()
+    print(main(args.years, args.segments).to_string(index=False))
@@ -0,0 +1,82 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of column, ``loc`` and ``iloc`` selection on a triangle with many
+index segments and several columns.  Selections are resolved against the
+cached key index and compared against resolving them through a table of one
+``(row, column)`` tuple per cell, as selection previously did.  The legacy
+timings cover resolving the positions only, not slicing the triangle.
+
+Usage::
+
+    python benchmarks/selection.py --segments 50000
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import chainladder as cl
+from triangle_construction import profile
+
+COLUMNS = ['paid', 'incurred', 'reported', 'closed', 'premium', 'exposure']
+
+
+def segment_triangle(segments, years=3):
+    """ A ``years`` annual triangle of several columns for each of
+    ``segments`` policies spread over a handful of lines of business """
+    origin, lag = np.triu_indices(years)
+    data = pd.DataFrame({
+        'policy': np.repeat(np.arange(segments), len(origin)),
+        'lob': np.repeat(np.array(['auto', 'home', 'liab', 'wc'])[
+            np.arange(segments) % 4], len(origin)),
+        'origin': np.tile(2000 + origin, segments),
+        'development': np.tile(2000 + lag, segments)})
+    for column in COLUMNS:
+        data[column] = 1.
+    return cl.Triangle(data, origin='origin', development='development',
+                       index=['policy', 'lob'], columns=COLUMNS)
+
+
+def legacy_positions(tri, how, key):
+    """ Index and column positions as resolved through the tuple table """
+    df = tri.index
+    for num, item in enumerate(tri.vdims):
+        df[item] = list(zip(np.arange(len(df)),
+                        (np.ones(len(df))*num).astype(int)))
+    df.set_index(tri.key_labels, inplace=True)
+    idx = df[key] if how == 'column' else getattr(df, how)[key]
+    if type(idx) is pd.Series:
+        idx = idx.to_frame()
+    x_0 = list(pd.Series([item[0] for item in idx.values[:, 0]]).unique())
+    x_1 = list(pd.Series([item[1] for item in idx.values[0, :]]).unique())
+    return x_0, x_1
+
+
+def main(segments=50000):
+    tri = segment_triangle(segments)
+    # The key index is built on first use and cached thereafter
+    tri._key_index()
+    rows = []
+    for how, key in [('column', 'paid'), ('column', ['paid', 'closed']),
+                     ('iloc', (slice(10, 1000), 1)),
+                     ('loc', (slice(None), 'premium')),
+                     ('loc', 1234)]:
+        if how == 'column':
+            current = lambda: tri[key]
+        else:
+            current = lambda: getattr(tri, how)[key]
+        for label, func in [('key index', current),
+                            ('legacy table', lambda: legacy_positions(
+                                tri, how, key))]:
+            elapsed, peak = profile(func)
+            rows.append((how, str(key), label, elapsed, peak))
+    return pd.DataFrame(rows, columns=['selection', 'key', 'path', 'seconds',
+                                       'peak_mb'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--segments', type=int, default=50000)
+    print(main(parser.parse_args().segments).to_string(index=False))
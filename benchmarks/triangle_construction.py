@@ -0,0 +1,108 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of Triangle construction on the bundled ``clrd`` and ``prism``
+datasets.  The current constructor is compared against the previous
+groupby/sparse densification approach on time and peak traced memory.
+
+Usage::
+
+    python benchmarks/triangle_construction.py --scale 10
+
+``--scale`` replicates the claim level ``prism`` feed to approximate larger
+extracts.
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import chainladder as cl
+
+DATA = os.path.join(os.path.dirname(cl.__file__), 'utils', 'data')
+
+CASES = {
+    'clrd': dict(origin='AccidentYear', development='DevelopmentYear',
+                 index=['GRNAME', 'LOB'],
+                 columns=['IncurLoss', 'CumPaidLoss', 'BulkLoss',
+                          'EarnedPremDIR', 'EarnedPremCeded',
+                          'EarnedPremNet']),
+    'prism': dict(origin='AccYrMo', development='ValYrMo',
+                  index=['Line', 'Type'],
+                  columns=['Paid', 'Incurred', 'reportedCount'])}
+
+
+def legacy_values(data, origin, development, index, columns):
+    """ The groupby, string-summed key and sparse densification steps that
+    the constructor previously used to assemble ``values``. """
+    import sparse
+    data_agg = data.groupby([origin, development] + index).sum() \
+                   .reset_index().fillna(0)
+    origin_date = pd.to_datetime(data_agg[origin].astype(str))
+    development_date = pd.to_datetime(data_agg[development].astype(str))
+    orig = dict(zip(np.sort(origin_date.unique()),
+                    range(origin_date.nunique())))
+    dev_lag = (development_date.dt.year - origin_date.dt.year)*12 + \
+        development_date.dt.month - origin_date.dt.month
+    dev = dict(zip(np.sort(dev_lag.unique()), range(dev_lag.nunique())))
+    key = data_agg[index].drop_duplicates().reset_index(drop=True)
+    kdims = {v: k for k, v in key.sum(axis=1).to_dict().items()}
+    orig_idx = origin_date.map(orig).values[np.newaxis].T
+    dev_idx = dev_lag.map(dev).values[np.newaxis].T
+    key_idx = data_agg[index].sum(axis=1).map(kdims).values[np.newaxis].T
+    val_idx = ((np.ones(len(data_agg))[np.newaxis].T) *
+               range(len(columns))).reshape((1, -1), order='F').T
+    coords = np.concatenate(
+        tuple([np.concatenate((orig_idx, dev_idx), axis=1)]*len(columns)),
+        axis=0)
+    coords = np.concatenate(
+        (np.concatenate(tuple([key_idx]*len(columns)), axis=0),
+         val_idx, coords), axis=1)
+    amts = data_agg[columns].unstack().values.astype('float64')
+    return sparse.COO(
+        coords.T.astype(int), amts,
+        shape=(len(key), len(columns), len(orig), len(dev))).todense()
+
+
+def current_values(data, **kwargs):
+    return cl.Triangle(data, **kwargs).values
+
+
+def profile(func, *args, **kwargs):
+    """ Returns the wall time of an untraced run and the peak traced memory
+    in MB of a second run. """
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(*args, **kwargs)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main(scale=1):
+    rows = []
+    for name, kwargs in CASES.items():
+        data = pd.read_csv(os.path.join(DATA, name + '.csv'))
+        if name == 'prism' and scale > 1:
+            data = pd.concat([data]*scale, ignore_index=True)
+        for label, func in [('current', current_values),
+                            ('legacy', legacy_values)]:
+            try:
+                elapsed, peak = profile(func, data, **kwargs)
+            except ImportError:
+                continue
+            rows.append((name, len(data), label, elapsed, peak))
+    return pd.DataFrame(
+        rows, columns=['dataset', 'rows', 'path', 'seconds', 'peak_mb'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scale', type=int, default=1)
+    print(main(parser.parse_args().scale).to_string(index=False))
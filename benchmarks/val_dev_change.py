@@ -0,0 +1,108 @@
+# This Source Code Form is subject to the terms of the Mozilla Public
+# License, v. 2.0. If a copy of the MPL was not distributed with this
+# file, You can obtain one at https://mozilla.org/MPL/2.0/.
+"""
+Benchmark of ``dev_to_val`` and ``val_to_dev`` on a monthly triangle.  The
+single gather/scatter is compared against the previous loop over each
+valuation (or lag), which is reproduced here as ``legacy_val_dev_chg``.
+
+Usage::
+
+    python benchmarks/val_dev_change.py --months 240 --segments 10
+"""
+import argparse
+import copy
+
+import numpy as np
+import pandas as pd
+
+import chainladder as cl
+from triangle_construction import profile
+
+
+def monthly(months, segments):
+    """ A ``months`` by ``months`` monthly triangle for each of ``segments``
+    index keys """
+    origin, lag = np.triu_indices(months)
+    dates = pd.date_range('2000-01-01', periods=months, freq='MS')
+    return cl.Triangle(pd.DataFrame({
+        'segment': np.repeat(np.arange(segments), len(origin)),
+        'origin': np.tile(dates[origin], segments),
+        'development': np.tile(dates[lag], segments),
+        'loss': np.random.RandomState(0).lognormal(
+            10, 1, segments * len(origin))}),
+        origin='origin', development='development', index='segment',
+        columns='loss', cumulative=True)
+
+
+def legacy_val_dev_chg(self, kind):
+    """ The loop over each valuation (or lag) replaced by the scatter """
+    xp = np
+    obj = copy.deepcopy(self)
+    obj.__dict__.pop('_nan_triangle_', None)
+    dtype = obj.values.dtype
+    o_vals = obj._expand_dims(
+        xp.arange(len(obj.origin), dtype=dtype)[:, xp.newaxis])
+    if kind == 'val_to_dev':
+        step = {'Y': 12, 'Q': 3, 'M': 1}[obj.development_grain]
+        mtrx = self._month_ordinal(obj.ddims)[np.newaxis] - \
+            self._month_ordinal(obj.odims)[:, np.newaxis] + 1
+        rng = range(mtrx[mtrx > 0].min(), mtrx.max()+1, step)
+    else:
+        rng = obj.valuation.unique().sort_values()
+    old_arr = None
+    for item in rng:
+        if kind == 'val_to_dev':
+            val = np.where(mtrx == item)
+        else:
+            val = np.where(obj._expand_dims(obj.valuation == item)
+                              .reshape(obj.shape, order='f'))[-2:]
+        val = np.unique(np.array(list(zip(val[0], val[1]))), axis=0)
+        arr = xp.expand_dims(obj.values[:, :, val[:, 0], val[:, 1]], -1)
+        if val[0, 0] != 0:
+            prepend = obj._expand_dims(
+                xp.full((val[0, 0], 1), xp.nan, dtype=dtype))
+            arr = xp.concatenate((prepend, arr), -2)
+        if len(obj.origin)-1-val[-1, 0] != 0:
+            append = obj._expand_dims(xp.full(
+                (len(obj.origin)-1-val[-1, 0], 1), xp.nan, dtype=dtype))
+            arr = xp.concatenate((arr, append), -2)
+        if obj.is_cumulative and old_arr is not None:
+            arr = xp.isnan(arr)*xp.nan_to_num(old_arr) + xp.nan_to_num(arr)
+        old_arr = arr.copy()
+        o_vals = xp.concatenate((o_vals, arr), -1)
+    obj.values = o_vals[..., 1:]
+    obj._nan_zeros()
+    if kind == 'val_to_dev':
+        obj.ddims = np.array([item for item in rng])
+        obj._reset_valuation()
+    else:
+        obj.ddims = obj.valuation.unique().sort_values()
+        obj.values = obj.values[..., :np.where(
+            obj.ddims <= obj.valuation_date)[0].max()+1]
+        obj.ddims = obj.ddims[obj.ddims <= obj.valuation_date]
+    return obj
+
+
+def main(months=240, segments=10):
+    dev = monthly(months, segments)
+    val = dev.dev_to_val()
+    rows = []
+    for kind, tri in [('dev_to_val', dev), ('val_to_dev', val)]:
+        current, legacy = tri._val_dev_chg(kind), legacy_val_dev_chg(tri, kind)
+        np.testing.assert_array_equal(current.values, legacy.values)
+        for label, func in [('scatter', tri._val_dev_chg),
+                            ('legacy loop', lambda x: legacy_val_dev_chg(
+                                tri, x))]:
+            elapsed, peak = profile(func, kind)
+            rows.append((kind, label, tri.shape, elapsed, peak))
+    return pd.DataFrame(rows, columns=['direction', 'path', 'shape',
+                                       'seconds', 'peak_mb'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--months', type=int, default=240)
+    parser.add_argument('--segments', type=int, default=10)
+    args = parser.parse_args()
+    print(main(args.months, args.segments).to_string(index=False))
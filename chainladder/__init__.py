@@ -1,9 +1,16 @@
 ARRAY_BACKEND = 'numpy'
 
+LAZY_ARITHMETIC = False
+
 def array_backend(array_backend='numpy'):
     global ARRAY_BACKEND
     ARRAY_BACKEND = array_backend
 
+def lazy_arithmetic(lazy=True):
+    ''' Defers Triangle arithmetic until the values are needed '''
+    global LAZY_ARITHMETIC
+    LAZY_ARITHMETIC = lazy
+
 from chainladder.utils import * # noqa (API Import)
 from chainladder.core import * # noqa (API Import)
 from chainladder.development import * # noqa (API Import)
@@ -3,16 +3,65 @@
 # file, You can obtain one at https://mozilla.org/MPL/2.0/.
 import pandas as pd
 import numpy as np
-import sparse
 from chainladder.utils.cupy import cp
 import warnings
+import copy
+import threading
+from collections import OrderedDict, namedtuple
 
 from chainladder.core.display import TriangleDisplay
-from chainladder.core.dunders import TriangleDunders
+from chainladder.core.dunders import TriangleDunders, _Expression
 from chainladder.core.pandas import TrianglePandas
 from chainladder.core.slice import TriangleSlicer
 from chainladder.core.io import TriangleIO
 
+# Successful date inference arguments keyed on column schema
+_datetime_format_cache = {}
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class _MaskCache:
+    ''' Thread-safe, size-bounded LRU cache of read-only NaN triangle masks
+        shared by all triangles with the same origin and development axes,
+        grains and valuation date. '''
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self.cache_clear()
+
+    def get(self, key, func):
+        ''' Returns the mask for key, calling func to build it on a miss '''
+        with self._lock:
+            mask = self._masks.get(key, None)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                self.hits += 1
+                return mask
+            self.misses += 1
+        mask = func()
+        if isinstance(mask, np.ndarray):
+            mask.flags.writeable = False
+        with self._lock:
+            mask = self._masks.setdefault(key, mask)
+            self._masks.move_to_end(key)
+            while len(self._masks) > self.maxsize:
+                self._masks.popitem(last=False)
+        return mask
+
+    def cache_info(self):
+        with self._lock:
+            return CacheInfo(
+                self.hits, self.misses, self.maxsize, len(self._masks))
+
+    def cache_clear(self):
+        with self._lock:
+            self._masks = OrderedDict()
+            self.hits = self.misses = 0
+
+
+_nan_triangle_cache = _MaskCache()
+
 
 class TriangleBase(TriangleIO, TriangleDisplay, TriangleSlicer,
                    TriangleDunders, TrianglePandas):
@@ -21,7 +70,8 @@ class TriangleBase(TriangleIO, TriangleDisplay, TriangleSlicer,
     def __init__(self, data=None, origin=None, development=None,
                  columns=None, index=None, origin_format=None,
                  development_format=None, cumulative=None,
-                 array_backend=None, *args, **kwargs):
+                 array_backend=None, n_jobs=None, packed=False,
+                 *args, **kwargs):
         if array_backend is None:
             from chainladder import ARRAY_BACKEND
             self.array_backend = ARRAY_BACKEND
@@ -33,64 +83,93 @@ class TriangleBase(TriangleIO, TriangleDisplay, TriangleSlicer,
         # Sanitize inputs
         index, columns, origin, development = self._str_to_list(
             index, columns, origin, development)
-        key_gr = origin + self._flatten(development, index)
-
-        # Aggregate data
-        data_agg = data.groupby(key_gr).sum().reset_index().fillna(0)
+        if type(data).__module__.split('.')[0] in ['pyarrow', 'polars']:
+            data = TriangleBase._aggregate_columnar(
+                data, [item for item in [origin, development, index] if item],
+                columns)
+        # Factorize origin, development and index into integer codes
+        n_jobs = n_jobs if index and n_jobs is not None else 1
+        fields = [item for item in [origin, development] if item]
+        fields = fields + [index] if index and n_jobs == 1 else fields
+        codes = [TriangleBase._factorize(data, item) for item in fields]
+        null_keys = np.any([item[0] < 0 for item in codes], axis=0)
+        if n_jobs != 1:
+            null_keys = null_keys | data[index].isnull().values.any(axis=1)
+        if null_keys.any():
+            # Observations with missing keys are excluded
+            data = data[~null_keys]
+            codes = [TriangleBase._factorize(data, item) for item in fields]
+        o_code, o_key = codes[0]
+        if development:
+            d_code, d_key = codes[1]
         if not index:
             index = ['Total']
-            data_agg[index[0]] = 'Total'
+            k_code, key = np.zeros(len(data), dtype=int), pd.DataFrame(
+                {'Total': ['Total']})
+        elif n_jobs == 1:
+            k_code, key = codes[-1]
+        else:
+            k_code = data[index]
         # Initialize origin and development dates and grains
         origin_date = TriangleBase._to_datetime(
-            data_agg, origin, format=origin_format)
+            o_key, origin, format=origin_format)
         self.origin_grain = TriangleBase._get_grain(origin_date)
         m_cnt = {'Y': 12, 'Q': 3, 'M': 1}
         if development:
             development_date = TriangleBase._to_datetime(
-                data_agg, development, period_end=True,
+                d_key, development, period_end=True,
                 format=development_format)
             self.development_grain = TriangleBase._get_grain(development_date)
-            col = 'development'
         else:
+            d_code = o_code
             development_date = origin_date + \
                 pd.tseries.offsets.MonthEnd(m_cnt[self.origin_grain])
             self.development_grain = self.origin_grain
-            col = None
         # Prep the data for 4D Triangle
         self.valuation_date = development_date.max()
-        origin_date = pd.PeriodIndex(origin_date, freq=self.origin_grain).to_timestamp()
-        # Assign object properties
-        date_axes = self._get_date_axes(origin_date, development_date) # cartesian product
-        dev_lag_unique = TriangleBase._development_lag(date_axes['origin'], date_axes['development'])
-        dev_lag = TriangleBase._development_lag(pd.Series(origin_date), pd.Series(development_date))
-        dev = np.sort(dev_lag_unique.unique())
-        orig = np.sort(date_axes['origin'].unique())
-        key = data_agg[index].drop_duplicates().reset_index(drop=True)
-        dev = dict(zip(dev, range(len(dev))))
-        orig = dict(zip(orig, range(len(orig))))
-        kdims = {v:k for k, v in key.sum(axis=1).to_dict().items()}
-        orig_idx = origin_date.map(orig).values[np.newaxis].T
+        origin_date = pd.Series(pd.PeriodIndex(
+            origin_date, freq=self.origin_grain).to_timestamp())
+        # Only unique origin/development pairs need date arithmetic
+        pair, p_code = TriangleBase._unique_inverse(
+            o_code*len(development_date) + d_code,
+            len(origin_date)*len(development_date))
+        origin_date = origin_date.iloc[pair // len(development_date)] \
+                                 .reset_index(drop=True)
+        development_date = development_date.iloc[
+            pair % len(development_date)].reset_index(drop=True)
+        orig, dev = self._get_date_axes(origin_date, development_date)
+        o_month = TriangleBase._month_ordinal(origin_date)
+        orig_idx = o_month // m_cnt[self.origin_grain] - \
+            o_month.min() // m_cnt[self.origin_grain]
         if development:
-            dev_idx = dev_lag.map(dev).values[np.newaxis].T
+            d_month = TriangleBase._month_ordinal(development_date)
+            dev_idx = d_month // m_cnt[self.development_grain] - \
+                o_month // m_cnt[self.development_grain]
         else:
-            dev_idx = (dev_lag*0).values[np.newaxis].T
-        data_agg = data_agg[origin_date<=development_date]
-        orig_idx = orig_idx[origin_date<=development_date]
-        dev_idx = dev_idx[origin_date<=development_date]
-        if sum(origin_date>development_date) > 0:
+            dev_idx = np.zeros(len(pair), dtype=int)
+        orig_idx, dev_idx = orig_idx[p_code], dev_idx[p_code]
+        amts = [data[item].values for item in columns]
+        valid = (origin_date <= development_date).values
+        if not valid.all():
             warnings.warn("Observations with development before origin start have been removed.")
-        key_idx = data_agg[index].sum(axis=1).map(kdims).values[np.newaxis].T
-        val_idx = ((np.ones(len(data_agg))[np.newaxis].T)*range(len(columns))).reshape((1,-1), order='F').T
-        coords = np.concatenate(tuple([np.concatenate((orig_idx, dev_idx), axis=1)]*len(columns)),  axis=0)
-        coords = np.concatenate((np.concatenate(tuple([key_idx]*len(columns)),  axis=0), val_idx, coords), axis=1)
-        amts = data_agg[columns].unstack().values.astype('float64')
-        values = sparse.COO(coords.T, amts, shape=(len(key), len(columns), len(orig), len(dev) if development else 1)).todense()
-        values[values==0.] = np.nan
+            valid = valid[p_code]
+            k_code, orig_idx, dev_idx = \
+                k_code[valid], orig_idx[valid], dev_idx[valid]
+            amts = [item[valid] for item in amts]
+        shape = (len(orig), len(dev) if development else 1)
+        if n_jobs == 1 and packed:
+            # Placed into packed positions once the axes are known
+            values = None
+        elif n_jobs == 1:
+            values = TriangleBase._scatter(
+                (k_code, orig_idx, dev_idx), amts, (len(key),) + shape)
+        else:
+            key, values = TriangleBase._parallel_scatter(
+                k_code, orig_idx, dev_idx, amts, shape, n_jobs)
         self.kdims = np.array(key)
-        self.odims = np.sort(date_axes['origin'].unique())
+        self.odims = orig
         if development:
-            self.ddims = np.sort(dev_lag_unique.unique())
-            self.ddims = self.ddims*(m_cnt[self.development_grain])
+            self.ddims = dev*(m_cnt[self.development_grain])
         else:
             self.ddims = np.array([None])
         self.vdims = np.array(columns)
@@ -105,12 +184,422 @@ class TriangleBase(TriangleIO, TriangleDisplay, TriangleSlicer,
             if cp == np:
                 warnings.warn('Unable to load CuPY.  Using numpy instead.')
                 self.array_backend = 'numpy'
-        self.values = xp.array(values, dtype=kwargs.get('dtype', None))
         # Used to show NANs in lower part of triangle
         self.nan_override = False
-        self.valuation = self._valuation_triangle()
+        self._reset_valuation()
+        if values is None:
+            cells = self._observed_cells(shape)
+            position = np.searchsorted(
+                cells, np.ravel_multi_index((orig_idx, dev_idx), shape))
+            values = TriangleBase._scatter(
+                (k_code, position), amts, (len(key), len(cells)))
+            self._packed = xp.array(values, dtype=kwargs.get('dtype', None))
+            self._cells = cells
+            self._nan_zeros()
+        else:
+            self.values = xp.array(values, dtype=kwargs.get('dtype', None))
+            self._nan_zeros()
+            if packed:
+                self.pack(inplace=True)
         self.is_cumulative = cumulative
 
+    @classmethod
+    def from_chunks(cls, chunks, origin=None, development=None, columns=None,
+                    index=None, *args, **kwargs):
+        ''' Constructs a Triangle from an iterable of DataFrame chunks, such
+            as ``pd.read_csv(..., chunksize=100000)``.  Each chunk is
+            aggregated to its unique origin/development/index combinations
+            and accumulated, so peak memory scales with the size of the
+            triangle rather than the raw data.
+
+        Parameters
+        ----------
+        chunks : iterable of DataFrame
+            DataFrames sharing the same schema
+        origin, development, columns, index :
+            See Triangle
+
+        Returns
+        -------
+            Triangle
+        '''
+        index, columns, origin, development = cls._str_to_list(
+            index, columns, origin, development)
+        keys = [item for item in [origin, development, index] if item]
+        keys = [field for item in keys for field in item]
+        data = None
+        for chunk in chunks:
+            chunk = chunk.groupby(keys, sort=False)[columns].sum()
+            data = chunk if data is None else data.add(chunk, fill_value=0)
+        if data is None:
+            raise ValueError('No data chunks were provided.')
+        return cls(data.reset_index(), origin=origin, development=development,
+                   columns=columns, index=index, *args, **kwargs)
+
+    @classmethod
+    def from_sql(cls, connection, table, origin=None, development=None,
+                 columns=None, index=None, *args, schema=None, **kwargs):
+        ''' Constructs a Triangle from a database table.  The aggregation to
+            unique origin/development/index cells is pushed down to the
+            database as a GROUP BY so that only aggregated rows are read.
+
+        Parameters
+        ----------
+        connection : DBAPI2 connection or SQLAlchemy connectable
+            Any connection supported by ``pd.read_sql``
+        table : str
+            The table or view holding the data
+        origin, development, columns, index :
+            See Triangle
+        schema : str or None
+            The schema of the table, if not the default schema
+
+        Returns
+        -------
+            Triangle
+        '''
+        index, columns, origin, development = cls._str_to_list(
+            index, columns, origin, development)
+        quote = cls._sql_quoter(connection)
+        keys = [item for item in [origin, development, index] if item]
+        keys = ', '.join([quote(field) for item in keys for field in item])
+        sums = ', '.join(['SUM({0}) AS {0}'.format(quote(item))
+                          for item in columns])
+        table = quote(table) if schema is None else \
+            quote(schema) + '.' + quote(table)
+        query = 'SELECT {0}, {1} FROM {2} GROUP BY {0}'.format(
+            keys, sums, table)
+        return cls(pd.read_sql(query, connection), origin=origin,
+                   development=development, columns=columns, index=index,
+                   *args, **kwargs)
+
+    @classmethod
+    def from_arrays(cls, values, kdims, vdims, odims, ddims, origin_grain,
+                    development_grain, valuation_date, key_labels=None,
+                    cumulative=None):
+        ''' Constructs a Triangle directly from arrays that are already in
+            triangle form, such as simulation output or cached model results.
+            Only the shapes and grains are validated; no date inference or
+            aggregation is performed.
+
+        Parameters
+        ----------
+        values : 4D array
+            Array of shape (len(kdims), len(vdims), len(odims), len(ddims))
+        kdims : 2D array
+            Index keys with one column per level of key_labels
+        vdims : array
+            Column labels
+        odims : array of datetime64
+            Start dates of the origin periods
+        ddims : array or DatetimeIndex
+            Development lags in months, or the valuation dates of a
+            valuation triangle
+        origin_grain, development_grain : str
+            One of 'Y', 'Q' or 'M'
+        valuation_date : datetime-like
+            The latest valuation date of the values
+        key_labels : list or None
+            Names of the index levels.  Defaults to 'Index'-prefixed labels.
+        cumulative : bool or None
+            Whether the values are cumulative
+
+        Returns
+        -------
+            Triangle
+        '''
+        xp = cp.get_array_module(values)
+        kdims, vdims = np.asarray(kdims), np.asarray(vdims)
+        kdims = kdims[:, np.newaxis] if kdims.ndim == 1 else kdims
+        odims = np.asarray(odims, dtype='datetime64[ns]')
+        ddims = np.asarray(ddims)
+        if ddims.dtype.kind == 'M':
+            # Valuation dates of a valuation triangle, which the Triangle
+            # keeps as a DatetimeIndex
+            ddims = pd.DatetimeIndex(ddims.astype('datetime64[ns]'))
+        shape = (len(kdims), len(vdims), len(odims), len(ddims))
+        if values.shape != shape:
+            raise ValueError(
+                'Shape mismatch: values have shape {} but axes imply {}'
+                .format(values.shape, shape))
+        for grain in [origin_grain, development_grain]:
+            if grain not in ['Y', 'Q', 'M']:
+                raise ValueError('Invalid grain: {}'.format(grain))
+        if key_labels is None:
+            key_labels = ['Index'] if kdims.shape[1] == 1 else \
+                ['Index' + str(num) for num in range(kdims.shape[1])]
+        if len(key_labels) != kdims.shape[1]:
+            raise ValueError('key_labels must name each level of kdims')
+        obj = cls(array_backend='cupy' if xp != np else 'numpy')
+        obj.values = values
+        obj.kdims, obj.vdims, obj.odims, obj.ddims = kdims, vdims, odims, ddims
+        obj.key_labels = list(key_labels)
+        obj.origin_grain, obj.development_grain = \
+            origin_grain, development_grain
+        if hasattr(valuation_date, 'to_datetime64'):
+            # Timestamps only keep their nanoseconds through to_datetime64
+            valuation_date = valuation_date.to_datetime64()
+        obj.valuation_date = pd.Timestamp(np.datetime64(valuation_date, 'ns'))
+        obj.is_cumulative = cumulative
+        obj.nan_override = False
+        obj._set_slicers()
+        return obj
+
+    @property
+    def values(self):
+        ''' 4D array of the triangle.  Pending lazy arithmetic is evaluated
+            on first access. '''
+        if '_expr' in self.__dict__:
+            self._evaluate()
+        elif '_packed' in self.__dict__:
+            self._unpack()
+        return self._values
+
+    @values.setter
+    def values(self, value):
+        for item in ['_expr', '_packed', '_cells']:
+            self.__dict__.pop(item, None)
+        self._values = value
+
+    @property
+    def valuation(self):
+        ''' Valuation dates of each origin/development cell, computed when
+            first needed. '''
+        if self.__dict__.get('_valuation', None) is None:
+            self._valuation = self._period_end(self._valuation_ordinals())
+        return self._valuation
+
+    @valuation.setter
+    def valuation(self, value):
+        self.__dict__.pop('_valuation_ordinals_', None)
+        self._valuation = value
+
+    def _valuation_ordinals(self):
+        ''' Month ordinals of the valuation of each origin/development cell in
+            the order of valuation.  These are cached until valuation is
+            reset, so that valuation based selection can be done with integer
+            comparisons. '''
+        if self.__dict__.get('_valuation_ordinals_', None) is None:
+            if self.__dict__.get('_valuation', None) is None:
+                months = self._valuation_months()
+            else:
+                months = self._month_ordinal(self._valuation)
+            months.flags.writeable = False
+            self._valuation_ordinals_ = months
+        return self._valuation_ordinals_
+
+    def _reset_valuation(self, ddims=None):
+        ''' Rederives the valuation ordinals from the origin and development
+            axes.  The valuation DatetimeIndex is then built when accessed. '''
+        self.valuation = None
+        months = self._valuation_months(ddims)
+        months.flags.writeable = False
+        self._valuation_ordinals_ = months
+
+    def _valuation_cutoff(self, date=None):
+        ''' Month ordinal of the latest month ending no later than date, the
+            valuation_date by default '''
+        date = self.valuation_date if date is None else pd.Timestamp(date)
+        return self._month_ordinal([date + pd.Timedelta(1, 'ns')])[0] - 1
+
+    @property
+    def kdims(self):
+        ''' Keys of the index axis.  These are stored as integer codes into
+            the categories of each index level and are materialized on
+            access. '''
+        if '_kraw' in self.__dict__:
+            return self._kraw.copy()
+        columns = [level[code] for code, level in
+                   zip(self._kcodes.T, self._klevels)]
+        if self._kform == 'tuple':
+            return np.array(pd.MultiIndex.from_arrays(columns))
+        kdims = np.empty(self._kcodes.shape, dtype=self._kdtype)
+        for num, column in enumerate(columns):
+            kdims[:, num] = column
+        return kdims if self._kform == 2 else kdims[:, 0]
+
+    @kdims.setter
+    def kdims(self, value):
+        # Keys are factorized into codes on first use of the codes
+        value = np.asarray(value)
+        for item in ['_index', '_kindex', '_kcodes_', '_klevels_']:
+            self.__dict__.pop(item, None)
+        if value.ndim == 1 and len(value) and type(value[0]) is tuple:
+            # Multi-level keys of a sliced triangle
+            self._kform = 'tuple'
+        else:
+            self._kform = value.ndim
+        self._kraw, self._kdtype = value, value.dtype
+
+    @property
+    def _kcodes(self):
+        ''' Integer codes of the index keys, one column per level '''
+        if '_kcodes_' not in self.__dict__:
+            self._factorize_kdims()
+        return self._kcodes_
+
+    @property
+    def _klevels(self):
+        ''' Categories of each level of the index keys '''
+        if '_klevels_' not in self.__dict__:
+            self._factorize_kdims()
+        return self._klevels_
+
+    def _factorize_kdims(self):
+        ''' Factorizes the keys set through kdims into codes and categories
+            of each level '''
+        value = self._kraw
+        if self._kform == 'tuple':
+            columns = [np.array(item, dtype=object) for item in zip(*value)]
+        else:
+            columns = list(value.reshape(len(value), -1).T)
+        codes, levels = [], []
+        for column in columns:
+            code, level = self._factorize_level(column)
+            codes.append(code)
+            levels.append(level)
+        self._kcodes_ = np.stack(codes, axis=1)
+        self._klevels_ = tuple(levels)
+
+    def _nkeys(self):
+        ''' Number of keys on the index axis '''
+        if '_kraw' in self.__dict__:
+            return len(self._kraw)
+        return len(self._kcodes_)
+
+    def _set_kcodes(self, codes, levels, kform=2, kdtype=object):
+        ''' Sets the index axis from the codes and categories of each level '''
+        for item in ['_index', '_kindex', '_kraw']:
+            self.__dict__.pop(item, None)
+        self._kcodes_ = np.stack(codes, axis=1)
+        self._klevels_ = tuple(levels)
+        self._kform, self._kdtype = kform, kdtype
+
+    def _set_index(self, value):
+        ''' Sets the index axis from a DataFrame, reusing the codes of any
+            categorical columns '''
+        codes, levels = [], []
+        for _, column in value.items():
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                code, level = column.cat.codes.values, \
+                    np.asarray(column.cat.categories)
+                if (code < 0).any():
+                    code, level = self._factorize_level(column.values)
+            else:
+                code, level = self._factorize_level(column.values)
+            codes.append(code)
+            levels.append(level)
+        self._set_kcodes(codes, levels, kdtype=value.values.dtype)
+
+    @staticmethod
+    def _factorize_level(level):
+        ''' Integer codes and categories of a level of index keys.  Missing
+            keys are kept as the last category. '''
+        level = np.asarray(level)
+        null = pd.isnull(level)
+        try:
+            code, unique = pd.factorize(level[~null], sort=True)
+        except TypeError:
+            # Keys of mixed types cannot be sorted
+            code, unique = pd.factorize(level[~null])
+        unique = np.asarray(unique, dtype=level.dtype)
+        if null.any():
+            full = np.full(len(level), len(unique), dtype=code.dtype)
+            full[~null] = code
+            code, unique = full, np.concatenate((unique, level[null][:1]))
+        return code.astype(np.min_scalar_type(max(len(unique) - 1, 0))), \
+            unique
+
+    def __deepcopy__(self, memo):
+        ''' Copy of the triangle (see ``_copy``) '''
+        return self._copy(memo=memo)
+
+    def _copy(self, values=True, memo=None):
+        ''' Deep copy of the triangle.  Arrays are copied, except read-only
+            arrays owning their data, such as the shared NaN triangle masks,
+            and the levels and index of the keys, which are not modified
+            once set.  With values=False the values are not copied and must
+            be set by the caller, which saves copying values that are about
+            to be replaced.
+        '''
+        memo = {} if memo is None else memo
+        obj = self.__class__.__new__(self.__class__)
+        memo[id(self)] = obj
+        skip = ['iloc', 'loc']
+        if not values:
+            skip = skip + ['_values', '_expr', '_packed', '_cells']
+        for k, v in self.__dict__.items():
+            if k in skip:
+                continue
+            if type(v) is np.ndarray:
+                if k in ['_values', '_packed'] or v.flags.writeable or \
+                   not v.flags.owndata:
+                    v = v.copy()
+            elif k in ['_klevels_', '_index']:
+                pass
+            elif not isinstance(v, (pd.Index, pd.Timestamp, str, _Expression)):
+                v = copy.deepcopy(v, memo)
+            obj.__dict__[k] = v
+        if 'iloc' in self.__dict__:
+            obj._set_slicers()
+        return obj
+
+    @staticmethod
+    def _read_only(arr):
+        ''' Read-only view of a numpy array, for a copy that holds the values
+            of another triangle only until it replaces them '''
+        if type(arr) is np.ndarray:
+            arr = arr.view()
+            arr.flags.writeable = False
+        return arr
+
+    @staticmethod
+    def _owned(arr, values):
+        ''' arr, copied if it is a view of values '''
+        xp = cp.get_array_module(arr)
+        return arr.copy() if xp.may_share_memory(arr, values) else arr
+
+    def _own_values(self):
+        ''' Replaces read-only values, such as broadcast views, with a
+            writeable copy.  Call before writing to values in place.
+        '''
+        if type(self.values) is np.ndarray and \
+           not self.values.flags.writeable:
+            self.values = self.values.copy()
+        return self.values
+
+    def _nan_zeros(self):
+        ''' Marks zero cells of values as unobserved (NaN) '''
+        if self.is_packed:
+            if type(self._packed) is np.ndarray and \
+               not self._packed.flags.writeable:
+                self._packed = self._packed.copy()
+            values = self._packed
+        else:
+            values = self._own_values()
+        values[values == 0] = np.nan
+        return self
+
+    def _observed_cells(self, shape=None):
+        ''' Flat positions within the (o, d) rectangle of the cells valued
+            no later than the valuation_date '''
+        shape = self.shape[-2:] if shape is None else shape
+        if min(shape) == 1 or self.nan_override:
+            return np.arange(np.prod(shape))
+        valuation = self._valuation_ordinals().reshape(shape, order='f')
+        return np.flatnonzero(valuation <= self._valuation_cutoff())
+
+    def _unpack(self):
+        ''' Expands packed values into the full (k, v, o, d) array '''
+        shape = self.shape
+        packed = self.__dict__.pop('_packed')
+        cells = self.__dict__.pop('_cells')
+        xp = cp.get_array_module(packed)
+        values = xp.full(shape[:2] + (shape[2] * shape[3],), xp.nan,
+                         dtype=packed.dtype)
+        values[..., cells] = packed
+        self._values = values.reshape(shape)
+
     def _len_check(self, x, y):
         if len(x) != len(y):
             raise ValueError(
@@ -119,101 +608,133 @@ class TriangleBase(TriangleIO, TriangleDisplay, TriangleSlicer,
                 ' {} elements'.format(len(y)))
 
     def _get_date_axes(self, origin_date, development_date):
-        ''' Function to find any missing origin dates or development dates that
-            would otherwise mess up the origin/development dimensions.
+        ''' Function to find the complete origin and development lag axes
+            spanned by the data, including any periods that would otherwise be
+            missing from holes in the triangle.  The axes are derived from the
+            extreme dates alone using integer month arithmetic.
+
+        Returns
+        -------
+            Tuple of origin period start dates and development lags (in
+            development grain periods)
         '''
-        def complete_date_range(origin_date, development_date,
-                                origin_grain, development_grain):
-            ''' Determines origin/development combinations in full.  Useful for
-                when the triangle has holes in it. '''
-            origin_unique = pd.period_range(
-                start=origin_date.min(),
-                end=max(origin_date.max(), self.valuation_date),
-                freq=origin_grain).to_timestamp()
-            development_unique = pd.period_range(
-                start=origin_date.min(),
-                end=development_date.max(),
-                freq=development_grain).to_timestamp(how='e')
-            # Let's get rid of any development periods before origin periods
-            cart_prod = TriangleBase._cartesian_product(
-                origin_unique, development_unique)
-            cart_prod = cart_prod[cart_prod[:, 0] <= cart_prod[:, 1], :]
-            return pd.DataFrame(cart_prod, columns=['origin', 'development'])
-        cart_prod_o = complete_date_range(
-            pd.Series(origin_date.min()), development_date,
-            self.origin_grain, self.development_grain)
-        cart_prod_d = complete_date_range(
-            origin_date, pd.Series(origin_date.max()),
-            self.origin_grain, self.development_grain)
-        cart_prod_t = pd.DataFrame({'origin': origin_date,
-                                   'development': development_date})
-        cart_prod = cart_prod_o.append(cart_prod_d, sort=True) \
-                               .append(cart_prod_t, sort=True) \
-                               .drop_duplicates()
-        cart_prod = cart_prod[cart_prod['development'] >= cart_prod['origin']]
-        return cart_prod
+        m_cnt = {'Y': 12, 'Q': 3, 'M': 1}
+        o_grain = m_cnt[self.origin_grain]
+        d_grain = m_cnt[self.development_grain]
+        start = TriangleBase._month_ordinal(origin_date).min()
+        end = TriangleBase._month_ordinal(pd.Series(
+            [origin_date.max(), development_date.max()])).max()
+        origin = np.arange(start // o_grain, end // o_grain + 1)
+        origin = (origin * o_grain).astype('datetime64[M]') \
+                                   .astype('datetime64[ns]')
+        lag = np.arange(1, end // d_grain - start // d_grain + 2)
+        return origin, lag
 
+    @staticmethod
+    def _month_ordinal(dates):
+        ''' Months elapsed since 1970-01 for an array-like of dates '''
+        return np.asarray(dates, dtype='datetime64[ns]') \
+                 .astype('datetime64[M]').astype('int64')
+
+    @staticmethod
+    def _period_end(months, grain='M'):
+        ''' Last instant of the period of grain containing each month
+            ordinal '''
+        step = {'Y': 12, 'Q': 3, 'M': 1}[grain]
+        months = (np.asarray(months) // step + 1) * step
+        return pd.DatetimeIndex(months.astype('datetime64[M]')
+                                      .astype('datetime64[ns]') -
+                                np.timedelta64(1, 'ns'))
+
+    @staticmethod
+    def _last_month(months, grain='M'):
+        ''' Month ordinal of the last month of the period of grain containing
+            each month ordinal '''
+        step = {'Y': 12, 'Q': 3, 'M': 1}[grain]
+        return (np.asarray(months) // step + 1) * step - 1
 
     def _nan_triangle(self):
         '''Given the current triangle shape and grain, it determines the
            appropriate placement of NANs in the triangle for future valuations.
            This becomes useful when managing array arithmetic.
         '''
-        xp = cp.get_array_module(self.values)
-        if min(self.values.shape[2:]) == 1 or self.nan_override:
-            return xp.ones(self.values.shape[2:], dtype='float16')
-        if len(self.valuation) != len(self.odims)*len(self.ddims) or not \
-           hasattr(self, '_nan_triangle_'):
-            self.valuation = self._valuation_triangle()
-            val_array = self.valuation
-            val_array = val_array.values.reshape(self.shape[-2:], order='f')
-            nan_triangle = xp.array(
-                pd.DataFrame(val_array) > self.valuation_date)
-            nan_triangle = xp.array(xp.where(nan_triangle, np.nan, 1), dtype='float16')
-            self._nan_triangle_ = nan_triangle
+        xp = cp.get_array_module(
+            self._packed if self.is_packed else self.values)
+        if min(self.shape[2:]) == 1 or self.nan_override:
+            return xp.ones(self.shape[2:], dtype='float16')
+        valuation = self.__dict__.get(
+            '_valuation_ordinals_', self.__dict__.get('_valuation', None))
+        if not hasattr(self, '_nan_triangle_') or (
+           valuation is not None and
+           len(valuation) != len(self.odims)*len(self.ddims)):
+            self.valuation = None
+            self._nan_triangle_ = _nan_triangle_cache.get(
+                self._nan_triangle_key(xp), self._build_nan_triangle)
         return self._nan_triangle_
 
+    def _build_nan_triangle(self):
+        xp = cp.get_array_module(
+            self._packed if self.is_packed else self.values)
+        self._reset_valuation()
+        val_array = self._valuation_ordinals().reshape(
+            self.shape[-2:], order='f')
+        nan_triangle = xp.array(val_array > self._valuation_cutoff())
+        return xp.array(xp.where(nan_triangle, np.nan, 1), dtype='float16')
+
+    def _nan_triangle_key(self, xp):
+        ''' The NaN triangle depends only on the origin and development
+            axes, the grains and the valuation date '''
+        if type(self.valuation_date) is not pd.Timestamp:
+            self.valuation_date = self.valuation_date.to_timestamp()
+        ddims = np.asarray(self.ddims)
+        if ddims.dtype.kind in 'iufMU':
+            ddims = ddims.dtype.str, ddims.tobytes()
+        else:
+            ddims = tuple(ddims.tolist())
+        return (xp.__name__, self._month_ordinal(self.odims).tobytes(), ddims,
+                self.origin_grain, self.development_grain,
+                self.valuation_date.value)
+
     def _valuation_triangle(self, ddims=None):
         ''' Given origin and development, develop a triangle of valuation
-        dates.
+        dates.  Valuations are derived with month ordinal arithmetic and
+        returned in origin-major order of the columns.
+        '''
+        return self._period_end(self._valuation_months(ddims))
+
+    def _valuation_months(self, ddims=None):
+        ''' Month ordinals of the last month of the valuation period of each
+        origin/development cell, in the order of ``_valuation_triangle``.
         '''
         ddims = self.ddims if ddims is None else ddims
+        if type(self.valuation_date) is not pd.Timestamp:
+            self.valuation_date = self.valuation_date.to_timestamp()
+        val_month = self._month_ordinal([self.valuation_date])[0]
         if type(ddims) == pd.DatetimeIndex:
-            return pd.DatetimeIndex(pd.DataFrame(
-                np.repeat(self.ddims.values[np.newaxis],
-                          len(self.odims), 0))
-                .unstack().values).to_period(self._lowest_grain()).to_timestamp(how='e')
+            return self._last_month(np.repeat(
+                self._month_ordinal(self.ddims), len(self.odims)),
+                self._lowest_grain())
         if ddims[0] is None:
-            ddims = pd.Series([self.valuation_date]*len(self.origin))
-            return pd.DatetimeIndex(ddims.values).to_period(self._lowest_grain()).to_timestamp(how='e')
+            return self._last_month(
+                np.repeat(val_month, len(self.odims)), self._lowest_grain())
         special_cases = dict(Ultimate='2262-03-01', Latest=self.valuation_date)
         if ddims[0] in special_cases.keys():
-            return pd.DatetimeIndex(
-                [pd.to_datetime(special_cases[ddims[0]])] *
-                len(self.origin)).to_period(self._lowest_grain()).to_timestamp(how='e')
+            month = self._month_ordinal([special_cases[ddims[0]]])[0]
+            return self._last_month(
+                np.repeat(month, len(self.odims)), self._lowest_grain())
         if type(ddims[0]) in [np.str_, str]:
             ddims = np.array([int(item[:item.find('-'):]) for item in ddims])
-        origin = pd.PeriodIndex(self.odims, freq=self.origin_grain) \
-                   .to_timestamp(how='s')
-        origin = pd.Series(origin)
-        if type(self.valuation_date) is not pd.Timestamp:
-            self.valuation_date = self.valuation_date.to_timestamp()
-        # Limit origin to valuation date
-        origin[origin > self.valuation_date] = self.valuation_date
-        next_development = origin+pd.DateOffset(days=-1, months=ddims[0])
-        val_array = np.array(next_development)[..., np.newaxis]
-        ddim_arr = ddims - ddims[0]
+        step = {'Y': 12, 'Q': 3, 'M': 1}[self.origin_grain]
+        origin = self._month_ordinal(self.odims) // step * step
+        # Origins after the valuation date are limited to it
+        future = (origin.astype('datetime64[M]') >
+                  self.valuation_date.to_datetime64())
+        origin[future] = val_month + (self.valuation_date.day != 1)
+        ddims = np.asarray(ddims, dtype='int64')
+        val_array = origin[:, np.newaxis] + ddims[np.newaxis] - 1
         if ddims[-1] == 9999:
-            val_array = (val_array.astype('datetime64[M]') +
-                         ddim_arr[:-1][np.newaxis]).astype('datetime64[D]')
-            next_development = pd.Series([pd.to_datetime('2262-03-01')] *
-                                         len(origin)).values[..., np.newaxis]
-            val_array = np.concatenate((val_array, next_development), -1)
-        else:
-            val_array = (val_array.astype('datetime64[M]') +
-                         ddim_arr[np.newaxis]).astype('datetime64[D]')
-        val_array = pd.DatetimeIndex(pd.DataFrame(val_array).unstack().values)
-        return val_array.to_period('M').to_timestamp(how='e')
+            val_array[:, -1] = self._month_ordinal(['2262-03-01'])[0]
+        return val_array.flatten(order='F')
 
     def _lowest_grain(self):
         my_list = ['M', 'Q', 'Y']
@@ -226,39 +747,48 @@ class TriangleBase(TriangleIO, TriangleDisplay, TriangleSlicer,
         '''Expands from one 2D triangle to full 4D object'''
         xp = cp.get_array_module(tri_2d)
         return xp.broadcast_to(
-            tri_2d, (len(self.kdims), len(self.vdims), *tri_2d.shape))
+            tri_2d, (self._nkeys(), len(self.vdims), *tri_2d.shape))
 
     @staticmethod
     def _to_datetime(data, fields, period_end=False, format=None):
         '''For tabular form, this will take a set of data
         column(s) and return a single date array.  This function heavily
-        relies on pandas, but does two additional things:
+        relies on pandas, but does three additional things:
         1. It extends the automatic inference using date_inference_list
         2. it allows pd_to_datetime on a set of columns
+        3. it remembers the explicit format that parsed each column schema
+           so that subsequent builds with the same schema try it first
         '''
         # Concat everything into one field
         if len(fields) > 1:
-            target_field = data[fields].astype(str).apply(
-                lambda x: '-'.join(x), axis=1)
+            target_field = TriangleBase._assemble_date(data, fields)
         else:
             target_field = data[fields].iloc[:, 0]
         if hasattr(target_field, 'dt'):
             target = target_field
         else:
             datetime_arg = target_field.unique()
+            schema = (tuple(fields), str(target_field.dtype), format)
             date_inference_list = \
-                [{'arg': datetime_arg, 'format': '%Y%m'},
-                 {'arg': datetime_arg, 'format': '%Y'},
-                 {'arg': datetime_arg, 'infer_datetime_format': True}]
+                [{'format': '%Y%m'},
+                 {'format': '%Y'},
+                 {'infer_datetime_format': True}]
             if format is not None:
-                date_inference_list = [{'arg': datetime_arg, 'format': format}] + \
+                date_inference_list = [{'format': format}] + \
+                                      date_inference_list
+            if schema in _datetime_format_cache:
+                date_inference_list = [_datetime_format_cache[schema]] + \
                                       date_inference_list
             for item in date_inference_list:
                 try:
-                    arr = dict(zip(datetime_arg, pd.to_datetime(**item)))
-                    break
-                except:
-                    pass
+                    arr = dict(zip(datetime_arg,
+                                   pd.to_datetime(datetime_arg, **item)))
+                except (ValueError, TypeError, OverflowError):
+                    continue
+                if 'format' in item:
+                    # Inferred formats depend on content and are not reused
+                    _datetime_format_cache[schema] = item
+                break
             target = target_field.map(arr)
         if period_end:
             target = target.dt.to_period(
@@ -267,20 +797,29 @@ class TriangleBase(TriangleIO, TriangleDisplay, TriangleSlicer,
         return target
 
     @staticmethod
-    def _development_lag(origin, development):
-        ''' For tabular format, this will convert the origin/development
-            difference to a development lag '''
-        year_diff = development.dt.year - origin.dt.year
-        quarter_diff = development.dt.quarter - origin.dt.quarter
-        month_diff = development.dt.month - origin.dt.month
-        if np.all(origin != development):
-            development_grain = TriangleBase._get_grain(development)
-        else:
-            development_grain = 'M'
-        diffs = dict(Y=year_diff + 1,
-                     Q=year_diff * 4 + quarter_diff + 1,
-                     M=year_diff * 12 + month_diff + 1)
-        return diffs[development_grain]
+    def _assemble_date(data, fields):
+        ''' Combines multiple date fields into a single field.  Integer
+            year/quarter or year/month(/day) fields are combined arithmetically
+            into dates.  Any other fields are joined as strings for inference.
+        '''
+        if len(fields) in [2, 3] and all(
+           [pd.api.types.is_integer_dtype(data[item]) for item in fields]):
+            year, period = data[fields[0]].values, data[fields[1]].values
+            name = str(fields[1]).lower()
+            quarter = len(fields) == 2 and \
+                (name == 'q' or 'qtr' in name or 'quarter' in name)
+            day = data[fields[2]].values if len(fields) == 3 else 1
+            if np.all((period >= 1) & (period <= (4 if quarter else 12))) \
+               and np.all((day >= 1) & (day <= 31)):
+                month = (period - 1)*3 + 1 if quarter else period
+                target = ((year - 1970)*12 + month - 1).astype('datetime64[M]')
+                target = target.astype('datetime64[D]') + \
+                    (np.asarray(day) - 1).astype('timedelta64[D]')
+                return pd.Series(target.astype('datetime64[ns]'),
+                                 index=data.index)
+        target = data[fields[0]].astype(str)
+        return target.str.cat(
+            [data[item].astype(str) for item in fields[1:]], sep='-')
 
     @staticmethod
     def _get_grain(array):
@@ -289,22 +828,130 @@ class TriangleBase(TriangleIO, TriangleDisplay, TriangleSlicer,
         return grain[len(months)]
 
     @staticmethod
-    def _cartesian_product(*arrays):
-        '''A fast implementation of cartesian product, used for filling in gaps
-        in triangles (if any)'''
-        arr = np.empty([len(a) for a in arrays]+[len(arrays)],
-                       dtype=np.result_type(*arrays))
-        for i, a in enumerate(np.ix_(*arrays)):
-            arr[..., i] = a
-        arr = arr.reshape(-1, len(arrays))
-        return arr
+    def _aggregate_columnar(data, fields, columns):
+        ''' Sums columns of a pyarrow Table or polars DataFrame over the
+            unique combinations of fields using that library's own group by
+            kernels.  Only the aggregated result is handed over to pandas,
+            with numeric columns passed as numpy buffers.
+        '''
+        fields = [field for item in fields for field in item]
+        columns = list(columns)
+        if type(data).__module__.split('.')[0] == 'polars':
+            import polars as pl
+            data = data.group_by(fields).agg(
+                [pl.col(item).sum() for item in columns])
+            return pd.DataFrame(
+                {item: data[item].to_numpy() for item in fields + columns},
+                copy=False)
+        data = data.group_by(fields).aggregate(
+            [(item, 'sum') for item in columns])
+        names = dict(zip(fields + [item + '_sum' for item in columns],
+                         fields + columns))
+        return pd.DataFrame(
+            {v: data.column(k).to_numpy() for k, v in names.items()},
+            copy=False)
 
-    def _str_to_list(self, *args):
-        return tuple([arg] if type(arg) is str else arg for arg in args)
+    @staticmethod
+    def _scatter_partition(data, orig_idx, dev_idx, amts, shape):
+        ''' Factorizes the index keys of a partition and scatters its
+            amounts into a 4D array '''
+        k_code, key = TriangleBase._factorize(data, list(data.columns))
+        return key, TriangleBase._scatter(
+            (k_code, orig_idx, dev_idx), amts, (len(key),) + shape)
+
+    @staticmethod
+    def _parallel_scatter(data, orig_idx, dev_idx, amts, shape, n_jobs):
+        ''' Hash-partitions observations by their index keys and assembles
+            each partition's values in a separate process.  Partitions share
+            the origin/development grid and have disjoint keys, so the pieces
+            are stacked along the index axis and put back in key order.
+        '''
+        from joblib import Parallel, delayed, effective_n_jobs
+        n_parts = effective_n_jobs(n_jobs)
+        part = (pd.util.hash_pandas_object(data, index=False).values %
+                n_parts).astype('int64')
+        order = np.argsort(part, kind='stable')
+        bounds = np.cumsum(np.bincount(part, minlength=n_parts))[:-1]
+        pieces = Parallel(n_jobs=n_jobs)(
+            delayed(TriangleBase._scatter_partition)(
+                data.iloc[idx], orig_idx[idx], dev_idx[idx],
+                [item[idx] for item in amts], shape)
+            for idx in np.split(order, bounds) if len(idx) > 0)
+        key = pd.concat([item[0] for item in pieces], ignore_index=True)
+        k_code, key = TriangleBase._factorize(key, list(key.columns))
+        values = np.concatenate([item[1] for item in pieces], axis=0)
+        return key, values[np.argsort(k_code)]
+
+    @staticmethod
+    def _factorize(data, fields):
+        ''' Encodes the unique combinations of one or more fields of data as
+            integer codes.  Codes are assigned in sorted order of the fields.
+
+        Returns
+        -------
+            Tuple of the code array and a DataFrame of the unique combinations
+            of fields indexed by code.
+        '''
+        codes, uniques = [], []
+        for field in fields:
+            code, unique = pd.factorize(data[field], sort=True)
+            codes.append(code)
+            uniques.append(unique)
+        if len(fields) == 1:
+            return codes[0], pd.DataFrame({fields[0]: uniques[0]})
+        # Combinations are numbered one field at a time, so the codes only
+        # range over the observed combinations rather than their product
+        valid = ~np.any([item < 0 for item in codes], axis=0)
+        code, keys = np.zeros(valid.sum(), dtype=np.int64), []
+        for item, unique in zip(codes, uniques):
+            size = len(unique)
+            flat, code = TriangleBase._unique_inverse(
+                code * size + item[valid], (len(keys[0]) if keys else 1) * size)
+            keys = [key[flat // size] for key in keys] + [flat % size]
+        out = np.full(len(valid), -1)
+        out[valid] = code
+        return out, pd.DataFrame(
+            {field: np.asarray(uniques[num])[keys[num]]
+             for num, field in enumerate(fields)})
 
-    def _flatten(self, *args):
-        return_list = []
-        for item in args:
-            if item:
-                return_list = return_list + item
-        return return_list
+    @staticmethod
+    def _unique_inverse(arr, size):
+        ''' Equivalent to np.unique(arr, return_inverse=True) for arrays of
+            non-negative integers less than size.  Counts are used instead of
+            sorting when size is not much larger than arr.
+        '''
+        if size > 4 * len(arr) + 1024:
+            unique, inverse = np.unique(arr, return_inverse=True)
+            return unique, inverse.reshape(-1)
+        present = np.bincount(arr, minlength=size) > 0
+        return np.flatnonzero(present), (np.cumsum(present) - 1)[arr]
+
+    @staticmethod
+    def _scatter(coords, amts, shape):
+        ''' Sums observations into a dense array of shape (k, v, o, d) where
+            coords is a tuple of the (k, o, d) position of each observation and
+            amts is a list of v arrays of amounts.  Observations that share a
+            position are summed and NaN amounts are treated as zero.
+        '''
+        position = np.ravel_multi_index(coords, shape)
+        values = np.empty((shape[0], len(amts), *shape[1:]))
+        for num, item in enumerate(amts):
+            item = np.asarray(item, dtype='float64')
+            values[:, num] = np.bincount(
+                position, weights=np.where(np.isnan(item), 0., item),
+                minlength=np.prod(shape)).reshape(shape)
+        return values
+
+    @staticmethod
+    def _sql_quoter(connection):
+        ''' Function quoting identifiers for the SQL dialect of connection '''
+        dialect = getattr(connection, 'dialect', None)
+        if dialect is not None:
+            # SQLAlchemy connectables
+            return dialect.identifier_preparer.quote_identifier
+        # DBAPI2 connections such as sqlite3 take ANSI quoted identifiers
+        return lambda name: '"{}"'.format(str(name).replace('"', '""'))
+
+    @staticmethod
+    def _str_to_list(*args):
+        return tuple([arg] if type(arg) is str else arg for arg in args)
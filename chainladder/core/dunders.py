@@ -6,22 +6,97 @@ import numpy as np
 from chainladder.utils.cupy import cp
 import copy
 
+class _Expression:
+    ''' A deferred elementwise operation between Triangle values and/or
+        scalars.  Nested expressions are evaluated in a single pass that
+        reuses one buffer along the chain, and the NaN-triangle masking is
+        left to the Triangle that finally needs the values.
+    '''
+    ufuncs = dict(add='add', sub='subtract', mul='multiply',
+                  truediv='true_divide', pow='power')
+
+    def __init__(self, op, left, right, shape, xp):
+        self.op, self.left, self.right, self.shape = op, left, right, shape
+        self.dtype = xp.result_type(
+            *[item.dtype if isinstance(item, _Expression) else item
+              for item in [left, right]], np.float16)
+
+    @property
+    def xp(self):
+        ''' The array module of the operands.  It is resolved on use rather
+            than stored so that pending expressions can be pickled. '''
+        for item in [self.left, self.right]:
+            if isinstance(item, _Expression):
+                return item.xp
+            if np.ndim(item) > 0:
+                return cp.get_array_module(item)
+        return np
+
+    @staticmethod
+    def operand(obj):
+        ''' The pending expression or a snapshot of the values behind an
+            operand, so that later writes to the operand do not reach the
+            pending result '''
+        if not isinstance(obj, TriangleDunders):
+            return obj
+        if obj.__dict__.get('_expr') is not None:
+            return obj._expr
+        return obj.values.copy()
+
+    def evaluate(self):
+        ''' Returns the unmasked result in a newly allocated array.  As with
+            eager arithmetic, NaNs of the left operand are treated as zero
+            and the right operand is only zero-filled for add/sub.
+        '''
+        xp = self.xp
+        if isinstance(self.left, _Expression):
+            out = xp.nan_to_num(self.left.evaluate(), copy=False)
+        elif xp.ndim(self.left) > 0:
+            out = xp.nan_to_num(xp.asarray(self.left, dtype=self.dtype))
+        else:
+            out = xp.nan_to_num(self.left)
+        if out.shape != self.shape:
+            out = xp.broadcast_to(out, self.shape).astype(self.dtype)
+        right = self.right
+        if isinstance(right, _Expression):
+            right = right.evaluate()
+            if self.op in ['add', 'sub']:
+                xp.nan_to_num(right, copy=False)
+            else:
+                right[right == 0] = np.nan
+        ufunc = getattr(xp, self.ufuncs[self.op])
+        if self.op in ['add', 'sub'] and xp.ndim(right) > 0 and \
+           not isinstance(self.right, _Expression):
+            ufunc(out, right, out=out, where=~xp.isnan(right))
+        else:
+            ufunc(out, xp.nan_to_num(right) if self.op in ['add', 'sub']
+                  else right, out=out)
+        return out
+
+
 class TriangleDunders:
     ''' Class that implements the dunder (double underscore) methods for the
         Triangle class
     '''
     def _validate_arithmetic(self, other):
         ''' Common functionality BEFORE arithmetic operations '''
-        obj = copy.deepcopy(self)
+        # The values of the copies are replaced by the operations, so they
+        # only hold read-only views of the operands in the meantime
+        obj = self._copy(values=False)
+        obj.values = self._read_only(self.values)
         xp = cp.get_array_module(obj.values)
-        other = other if type(other) in [int, float] else copy.deepcopy(other)
+        if type(other) not in [int, float] and \
+           isinstance(other, TriangleDunders):
+            other_values = other.values
+            other = other._copy(values=False)
+            other.values = self._read_only(other_values)
         ddims = None
         odims = None
         if type(other) not in [int, float, np.float64, np.int64, xp.ndarray]:
             if len(self.vdims) != len(other.vdims):
                 raise ValueError('Triangles must have the same number of ' +
                                  'columns')
-            if len(self.kdims) != len(other.kdims):
+            if self._nkeys() != other._nkeys():
                 raise ValueError('Triangles must have the same number of ' +
                                  'index')
             if len(self.vdims) == 1:
@@ -75,20 +150,75 @@ class TriangleDunders:
                 obj.values = obj_arr
                 other.values = other_arr
                 obj._set_slicers()
-                obj.valuation = obj._valuation_triangle()
+                obj._reset_valuation()
                 if hasattr(obj, '_nan_triangle_'):
                     # Force update on _nan_triangle at next access.
                     del obj._nan_triangle_
             other = other.values
         return obj, other
 
+    def _lazy_arithmetic(self, op, other, reflected=False):
+        ''' When lazy arithmetic is enabled, returns a copy of the triangle
+            whose values are a pending expression of op.  Returns None when
+            the operands need the alignment of eager arithmetic.
+        '''
+        from chainladder import LAZY_ARITHMETIC
+        if not LAZY_ARITHMETIC:
+            return None
+        xp = self._expr.xp if '_expr' in self.__dict__ else \
+            cp.get_array_module(self.values)
+        if isinstance(other, TriangleDunders):
+            if self.shape[:2] != other.shape[:2]:
+                return None
+            other_shape = other.shape
+        elif type(other) in [int, float, np.float64, np.int64]:
+            other_shape = ()
+        else:
+            return None
+        try:
+            shape = np.broadcast_shapes(self.shape, other_shape)
+        except ValueError:
+            return None
+        if shape != self.shape:
+            return None
+        obj = self._copy(values=False)
+        operands = [_Expression.operand(self), _Expression.operand(other)]
+        operands = operands[::-1] if reflected else operands
+        obj._expr = _Expression(op, *operands, shape, xp)
+        return obj
+
+    def _evaluate(self):
+        ''' Evaluates a pending expression and applies the cleanup of eager
+            arithmetic once. '''
+        expr = self.__dict__.pop('_expr')
+        self._values = expr.evaluate()
+        self._values *= self._expand_dims(self._nan_triangle())
+        self._values[self._values == 0] = np.nan
+
     def _arithmetic_cleanup(self, obj):
         ''' Common functionality AFTER arithmetic operations '''
         obj.values = obj.values * self._expand_dims(obj._nan_triangle())
-        obj.values[obj.values == 0] = np.nan
-        return obj
+        return obj._nan_zeros()
+
+    def _scale(self, other, op):
+        ''' Scaling of a packed triangle by a nonzero scalar, which only
+            needs the observed cells and keeps the triangle packed.  Returns
+            None otherwise.
+        '''
+        if not self.is_packed or \
+           type(other) not in [int, float, np.float64, np.int64] or \
+           other == 0 or not np.isfinite(other):
+            return None
+        obj = copy.deepcopy(self)
+        xp = cp.get_array_module(self._packed)
+        ufunc = dict(mul=xp.multiply, truediv=xp.true_divide)[op]
+        obj._packed = ufunc(self._packed, other)
+        return obj._nan_zeros()
 
     def __add__(self, other):
+        obj = self._lazy_arithmetic('add', other)
+        if obj is not None:
+            return obj
         xp = cp.get_array_module(self.values)
         obj, other = self._validate_arithmetic(other)
         obj.values = xp.nan_to_num(obj.values) + xp.nan_to_num(other)
@@ -98,6 +228,9 @@ class TriangleDunders:
         return self if other == 0 else self.__add__(other)
 
     def __sub__(self, other):
+        obj = self._lazy_arithmetic('sub', other)
+        if obj is not None:
+            return obj
         xp = cp.get_array_module(self.values)
         obj, other = self._validate_arithmetic(other)
         obj.values = xp.nan_to_num(obj.values) - \
@@ -105,29 +238,120 @@ class TriangleDunders:
         return self._arithmetic_cleanup(obj)
 
     def __rsub__(self, other):
+        obj = self._lazy_arithmetic('sub', other, reflected=True)
+        if obj is not None:
+            return obj
         xp = cp.get_array_module(self.values)
         obj, other = self._validate_arithmetic(other)
         obj.values = xp.nan_to_num(other) - \
             xp.nan_to_num(obj.values)
         return self._arithmetic_cleanup(obj)
 
+    def _inplace_arithmetic(self, op, other, out):
+        ''' Applies the arithmetic operation op between self and other and
+            writes the result into the values buffer of out, skipping the
+            copies and temporaries of the binary operators.  Operands needing
+            alignment on a union of origins/developments fall back to the
+            binary operator when out is self.
+        '''
+        xp = cp.get_array_module(self.values)
+        other_values = other.values if isinstance(other, TriangleDunders) \
+            else other
+        try:
+            shape = xp.broadcast(self.values, other_values).shape
+        except ValueError:
+            shape = None
+        if isinstance(other, TriangleDunders) and \
+           self.shape[:2] != other.shape[:2]:
+            shape = None
+        if shape != self.shape or out.shape != self.shape:
+            if out is self:
+                return getattr(self, '__{}__'.format(op))(other)
+            raise ValueError('out must be a Triangle with the shape of the '
+                             'result')
+        values = out._own_values()
+        if xp.ndim(other_values) and xp.may_share_memory(values, other_values):
+            # out aliases other, so other is read from a temporary
+            other_values = other_values.copy()
+        if out is not self:
+            values[...] = self.values
+        ufunc = dict(add=xp.add, sub=xp.subtract, mul=xp.multiply,
+                     truediv=xp.true_divide)[op]
+        if op in ['add', 'sub']:
+            xp.nan_to_num(values, copy=False)
+            if xp.ndim(other_values) == 0:
+                ufunc(values, xp.nan_to_num(other_values), out=values)
+            else:
+                ufunc(values, other_values, out=values,
+                      where=~xp.isnan(other_values))
+        else:
+            ufunc(values, other_values, out=values)
+        values *= self._expand_dims(self._nan_triangle())
+        values[values == 0] = np.nan
+        return out
+
+    def add(self, other, out=None):
+        ''' Addition of other, optionally writing into the values of the
+            Triangle out rather than a new Triangle '''
+        if out is None:
+            return self.__add__(other)
+        return self._inplace_arithmetic('add', other, out)
+
+    def sub(self, other, out=None):
+        ''' Subtraction of other, optionally writing into the values of the
+            Triangle out rather than a new Triangle '''
+        if out is None:
+            return self.__sub__(other)
+        return self._inplace_arithmetic('sub', other, out)
+
+    def mul(self, other, out=None):
+        ''' Multiplication by other, optionally writing into the values of
+            the Triangle out rather than a new Triangle '''
+        if out is None:
+            return self.__mul__(other)
+        return self._inplace_arithmetic('mul', other, out)
+
+    def truediv(self, other, out=None):
+        ''' Division by other, optionally writing into the values of the
+            Triangle out rather than a new Triangle '''
+        if out is None:
+            return self.__truediv__(other)
+        return self._inplace_arithmetic('truediv', other, out)
+
+    def __iadd__(self, other):
+        return self._inplace_arithmetic('add', other, self)
+
+    def __isub__(self, other):
+        return self._inplace_arithmetic('sub', other, self)
+
+    def __imul__(self, other):
+        return self._inplace_arithmetic('mul', other, self)
+
+    def __itruediv__(self, other):
+        return self._inplace_arithmetic('truediv', other, self)
+
     def __len__(self):
         return self.shape[0]
 
     def __neg__(self):
-        obj = copy.deepcopy(self)
-        obj.values = -obj.values
+        obj = self._copy(values=False)
+        obj.values = -self.values
         return obj
 
     def __pos__(self):
         return self
 
     def __abs__(self):
-        obj = copy.deepcopy(self)
-        obj.values = abs(obj.values)
+        obj = self._copy(values=False)
+        obj.values = abs(self.values)
         return obj
 
     def __mul__(self, other):
+        obj = self._lazy_arithmetic('mul', other)
+        if obj is None:
+            obj = self._scale(other, 'mul')
+        if obj is not None:
+            return obj
         xp = cp.get_array_module(self.values)
         obj, other = self._validate_arithmetic(other)
         obj.values = xp.nan_to_num(obj.values)*other
@@ -137,6 +361,9 @@ class TriangleDunders:
         return self if other == 1 else self.__mul__(other)
 
     def __pow__(self, other):
+        obj = self._lazy_arithmetic('pow', other)
+        if obj is not None:
+            return obj
         xp = cp.get_array_module(self.values)
         obj, other = self._validate_arithmetic(other)
         obj.values = xp.nan_to_num(obj.values)**other
@@ -150,16 +377,23 @@ class TriangleDunders:
 
 
     def __truediv__(self, other):
+        obj = self._lazy_arithmetic('truediv', other)
+        if obj is None:
+            obj = self._scale(other, 'truediv')
+        if obj is not None:
+            return obj
         xp = cp.get_array_module(self.values)
         obj, other = self._validate_arithmetic(other)
         obj.values = xp.nan_to_num(obj.values)/other
         return self._arithmetic_cleanup(obj)
 
     def __rtruediv__(self, other):
-        obj = copy.deepcopy(self)
+        obj = self._lazy_arithmetic('truediv', other, reflected=True)
+        if obj is not None:
+            return obj
+        obj = self._copy(values=False)
         obj.values = other / self.values
-        obj.values[obj.values == 0] = np.nan
-        return obj
+        return obj._nan_zeros()
 
     def __eq__(self, other):
         xp = cp.get_array_module(self.values)
@@ -10,26 +10,66 @@ import copy
 class TriangleGroupBy:
     def __init__(self, old_obj, by):
         obj = copy.deepcopy(old_obj)
-        if by != -1:
-            indices = obj.index.groupby(by).indices
-            new_index = obj.index.groupby(by).count().index
+        if not (type(by) is int and by == -1):
+            keys, by = self._group_keys(obj, by)
+            code, new_index = obj._factorize(keys, list(keys.columns))
+            # Keys missing a group label are excluded like pandas groupby
+            order = np.argsort(code, kind='stable')
+            order = order[code[order] >= 0]
+            bounds = np.cumsum(np.bincount(code[order], minlength=len(new_index)))
+            self.groups = np.split(order, bounds[:-1])
+            kdims = new_index.values
+            obj.kdims = kdims[:, 0] if kdims.shape[1] == 1 else kdims
         else:
-            indices = {'All': np.arange(len(obj.index))}
-            new_index = pd.Index(['All'], name='All')
-        groups = [indices[item] for item in sorted(list(indices.keys()))]
-        xp = cp.get_array_module(obj.values)
-        old_k_by_new_k = xp.zeros(
-            (len(obj.index.index), len(groups)), dtype='bool')
-        for num, item in enumerate(groups):
-            old_k_by_new_k[:, num][item] = True
-        old_k_by_new_k = xp.swapaxes(old_k_by_new_k, 0, 1)
-        for i in range(3):
-            old_k_by_new_k = old_k_by_new_k[..., np.newaxis]
-        self.old_k_by_new_k = old_k_by_new_k
-        obj.kdims = np.array(list(new_index))
-        obj.key_labels = list(new_index.names)
+            self.groups = [np.arange(len(obj.kdims))]
+            by = ['All']
+            obj.kdims = np.array(['All'])
+        self.groups = [self._contig_slice(item) for item in self.groups]
+        obj.key_labels = by
         self.obj = obj
 
+    @staticmethod
+    def _group_keys(obj, by):
+        ''' Group keys of each index key and their labels.  Like pandas, by
+            holds key labels, Series aligned to the index or arrays with one
+            group key per index key. '''
+        if type(by) not in [list, tuple]:
+            by = [by]
+        keys, labels = {}, []
+        for num, item in enumerate(by):
+            if isinstance(item, pd.Series):
+                keys[num], label = obj._align_keys(item), item.name
+            elif pd.api.types.is_list_like(item):
+                keys[num] = np.asarray(item)
+                label = getattr(item, 'name', None)
+                if len(keys[num]) != obj.shape[0]:
+                    raise ValueError('Grouper and index must be same length')
+            else:
+                keys[num], label = obj.index[item].values, item
+            labels.append(label)
+        return pd.DataFrame(keys), labels
+
+    @staticmethod
+    def _contig_slice(arr):
+        ''' Group members that are contiguous can be sliced without a copy '''
+        if len(arr) > 0 and arr[-1] - arr[0] + 1 == len(arr):
+            return slice(arr[0], arr[-1] + 1)
+        return arr
+
+    def _reduce(self, func, *args, **kwargs):
+        ''' Applies func over the index axis of each group of the triangle '''
+        xp = cp.get_array_module(self.obj.values)
+        values = []
+        for item in self.groups:
+            x = self.obj.values[item]
+            x = xp.where(xp.isfinite(x), x, xp.nan)
+            ignore_vector = xp.all(xp.isnan(x), axis=0, keepdims=True)
+            x = xp.where(ignore_vector, 0, x)
+            values.append(func(x, axis=0, *args, **kwargs))
+        values = xp.stack(values, axis=0)
+        values[values == 0] = np.nan
+        return values
+
     def quantile(self, q, axis=1, *args, **kwargs):
         """ Return values at the given quantile over requested axis.  If
             Triangle is convertible to DataFrame then pandas quantile
@@ -48,13 +88,8 @@ class TriangleGroupBy:
 
         """
         xp = cp.get_array_module(self.obj.values)
-        x = self.obj.values*self.old_k_by_new_k
-        ignore_vector = xp.sum(xp.isnan(x), axis=1, keepdims=True) == \
-            x.shape[1]
-        x = xp.where(ignore_vector, 0, x)
-        self.obj.values = \
-            getattr(xp, 'nanpercentile')(x, q*100, axis=1, *args, **kwargs)
-        self.obj.values[self.obj.values == 0] = np.nan
+        self.obj.values = self._reduce(
+            getattr(xp, 'nanpercentile'), q*100, *args, **kwargs)
         return self.obj
 
 
@@ -139,8 +174,9 @@ class TrianglePandas:
 
         Parameters
         ----------
-        by: str or list
-            The index to group by
+        by: str, list, Series or array
+            The index levels to group by, or as in pandas, a Series aligned
+            to the index or an array with a group key for each index key
 
         Returns
         -------
@@ -165,7 +201,8 @@ class TrianglePandas:
         """
         xp = cp.get_array_module(self.values)
         return_obj = copy.deepcopy(self)
-        return_obj.kdims = (return_obj.index.append(other.index)).values
+        return_obj._set_index(pd.concat(
+            (return_obj.index, other.index), ignore_index=True))
         try:
             return_obj.values = xp.concatenate((return_obj.values, other.values), axis=0)
         except:
@@ -227,27 +264,34 @@ class TrianglePandas:
 def add_triangle_agg_func(cls, k, v):
     ''' Aggregate Overrides in Triangle '''
     def agg_func(self, axis=None, *args, **kwargs):
-            obj = copy.deepcopy(self)
             if axis is None:
-                axis = min([num for num, _ in enumerate(obj.shape) if _ != 1])
+                axis = min([num for num, _ in enumerate(self.shape) if _ != 1])
             else:
                 axis = self._get_axis(axis)
-            xp = cp.get_array_module(obj.values)
-            func = getattr(xp, v)
             kwargs.update({'keepdims': True})
-            obj.values = func(obj.values, axis=axis, *args, **kwargs)
-            if axis == 0 and obj.values.shape[axis] == 1:
+            if self.is_packed and axis in [0, 1]:
+                # Observed cells are aligned across the index and columns
+                obj = copy.deepcopy(self)
+                func = getattr(cp.get_array_module(obj._packed), v)
+                obj._packed = func(obj._packed, axis=axis, *args, **kwargs)
+            else:
+                values = self.values
+                obj = self._copy(values=False)
+                func = getattr(cp.get_array_module(values), v)
+                obj.values = func(values, axis=axis, *args, **kwargs)
+            if axis == 0 and obj.shape[axis] == 1:
                 obj.kdims = np.array([None])
                 obj.key_labels = [None]
-            if axis == 1 and obj.values.shape[axis] == 1:
+            if axis == 1 and obj.shape[axis] == 1:
                 obj.vdims = np.array([None])
-            if axis == 2 and obj.values.shape[axis] == 1:
+            if axis == 2 and obj.shape[axis] == 1:
                 obj.odims = np.array([None])
-            if axis == 3 and obj.values.shape[axis] == 1:
+            if axis == 3 and obj.shape[axis] == 1:
                 obj.ddims = np.array([None])
             obj._set_slicers()
-            obj.values = obj.values * obj._expand_dims(obj._nan_triangle())
-            obj.values[obj.values == 0] = np.nan
+            if not obj.is_packed:
+                obj.values = obj.values * obj._expand_dims(obj._nan_triangle())
+            obj._nan_zeros()
             if obj.shape == (1, 1, 1, 1):
                 return obj.values[0, 0, 0, 0]
             else:
@@ -258,19 +302,9 @@ def add_triangle_agg_func(cls, k, v):
 def add_groupby_agg_func(cls, k, v):
     ''' Aggregate Overrides in GroupBy '''
     def agg_func(self, axis=1, *args, **kwargs):
-        obj = copy.deepcopy(self.obj)
-        xp = cp.get_array_module(obj.values)
-        x = xp.broadcast_to(
-            self.obj.values,
-            (self.old_k_by_new_k.shape[0], *self.obj.values.shape)) * \
-            self.old_k_by_new_k
-        ignore_vector = xp.sum(np.isnan(x), axis=1, keepdims=True) == \
-            x.shape[1]
-        x = xp.where(ignore_vector, 0, x)
-        x[~xp.isfinite(x)] = np.nan
-        obj.values = \
-            getattr(xp, v)(x, axis=1, *args, **kwargs)
-        obj.values[obj.values == 0] = np.nan
+        obj = self.obj._copy(values=False)
+        xp = cp.get_array_module(self.obj.values)
+        obj.values = self._reduce(getattr(xp, v), *args, **kwargs)
         return obj
     set_method(cls, agg_func, k)
 
@@ -12,35 +12,57 @@ class _LocBase:
     def __init__(self, obj):
         self.obj = obj
 
-    def get_idx(self, idx):
-        ''' Returns a slice of the original Triangle '''
-        obj = copy.deepcopy(self.obj)
-        vdims = pd.Series(obj.vdims)
-        obj.kdims = np.array(idx.index)
-        obj.vdims = np.array(idx.columns)
-        obj.key_labels = list(idx.index.names)
+    def get_idx(self, x_0, x_1, names=None):
+        ''' Returns a slice of the original Triangle at index positions x_0
+            and column positions x_1.  names are the key labels remaining
+            after the selection when pandas drops levels of the keys. '''
+        obj = copy.deepcopy(self.obj) if self.obj.is_packed else \
+            self.obj._copy(values=False)
+        x_0, x_1 = self._contig_slice(x_0), self._contig_slice(x_1)
+        names = list(obj.key_labels) if names is None else list(names)
+        if set(names) <= set(obj.key_labels) and len(set(names)) == \
+           len(names) and len(set(obj.key_labels)) == len(obj.key_labels):
+            # Keys are taken from the codes of the levels pandas retained
+            levels = [obj.key_labels.index(item) for item in names]
+            obj._set_kcodes(
+                list(obj._kcodes[x_0][:, levels].T),
+                [obj._klevels[item] for item in levels],
+                'tuple' if len(levels) > 1 else 1, obj._kdtype)
+        else:
+            obj.kdims = np.array(obj._key_index()[x_0])
+        obj.vdims = np.asarray(obj.vdims)[x_1]
+        obj.key_labels = names
         obj.iloc, obj.loc = Ilocation(obj), Location(obj)
-        x_0 = list(pd.Series([item[0] for item in idx.values[:, 0]]).unique())
-        x_1 = list(pd.Series([item[1] for item in idx.values[0, :]]).unique())
-        obj.values = \
-            obj.values[self._contig_slice(x_0), ...][:, self._contig_slice(x_1), ...]
-        obj.values[obj.values == 0] = np.nan
-        return obj
-
-    def _contig_slice(self, arr):
-        if len(arr) == 1:
+        if obj.is_packed:
+            obj._packed = obj._packed[x_0][:, x_1]
+        else:
+            values = self.obj.values
+            obj.values = obj._owned(values[x_0][:, x_1], values)
+        return obj._nan_zeros()
+
+    @staticmethod
+    def _contig_slice(arr):
+        ''' Evenly spaced positions are taken as a slice, i.e. a view '''
+        if type(arr) is slice:
             return arr
-        diff = np.diff(arr)
-        step  = None if arr[0] < arr[-1] else -1
-        if diff.max() == diff.min() and diff.max() in [1, -1]:
-            # index is sorted, so use its sort for better performance
-            if not step:
-                return slice(min(arr), max(arr) + 1, step)
-            else:
-                min_arr = None if min(arr) == 0 else min(arr)
-                return slice(max(arr), min_arr, step)
+        arr = np.asarray(arr, dtype=int).reshape(-1)
+        if len(arr) == 1:
+            return slice(arr[0], arr[0] + 1)
+        if len(arr) > 1:
+            step = arr[1] - arr[0]
+            if step != 0 and (np.diff(arr) == step).all():
+                stop = arr[-1] + step
+                return slice(arr[0], None if stop < 0 else stop, step)
         return arr
 
+    @staticmethod
+    def _positions(result, index):
+        ''' Integer positions and remaining key labels of a selection made
+            on a Series of positions '''
+        if isinstance(result, pd.Series):
+            return result.values, list(result.index.names)
+        return np.array([result]), list(index.names)
+
 
 class Location(_LocBase):
     ''' class to generate .loc[] functionality '''
@@ -49,46 +71,69 @@ class Location(_LocBase):
             return self.obj[key]
         if type(key) == tuple and type(key[0]) == pd.Series:
             return self.obj[key[0]][key[1]]
-        idx = self.obj._idx_table().loc[key]
-        return self.get_idx(self.obj._idx_table_format(idx))
+        index = self.obj._key_index()
+        rows = pd.Series(np.arange(len(index)), index=index)
+        columns = pd.Series(np.arange(len(self.obj.vdims)),
+                            index=self.obj.columns)
+        if type(key) is tuple:
+            if isinstance(index, pd.MultiIndex) and not any(
+               type(item) is slice or pd.api.types.is_list_like(item)
+               for item in key):
+                # Like pandas, a tuple is first tried as a key of the index
+                try:
+                    x_0, names = self._positions(rows.loc[key], index)
+                    return self.get_idx(x_0, slice(None), names)
+                except KeyError:
+                    if len(key) > 2:
+                        raise
+            key, column = (key + (slice(None),))[:2]
+        else:
+            column = slice(None)
+        x_0, names = self._positions(rows.loc[key], index)
+        x_1 = columns.loc[column]
+        return self.get_idx(x_0, x_1, names)
 
 
 class Ilocation(_LocBase):
     ''' class to generate .iloc[] functionality '''
     def __getitem__(self, key):
-        idx = self.obj._idx_table().iloc[key]
-        return self.get_idx(self.obj._idx_table_format(idx))
+        key, column = (key + (slice(None),))[:2] if type(key) is tuple \
+            else (key, slice(None))
+        x_0 = self._iloc_positions(key, self.obj.shape[0])
+        x_1 = self._iloc_positions(column, self.obj.shape[1])
+        return self.get_idx(x_0, x_1)
+
+    @staticmethod
+    def _iloc_positions(key, length):
+        if type(key) is slice:
+            return key
+        return np.arange(length)[key]
 
 
 class TriangleSlicer:
     ''' Slicer functionality '''
-    def _idx_table_format(self, idx):
-        if type(idx) is pd.Series:
-            # One row or one column selection is it k or v?
-            if len(set(idx.index).intersection(set(self.vdims))) == len(idx):
-                # One column selection
-                idx = idx.to_frame().T
-                idx.index.names = self.key_labels
-            else:
-                # One row selection
-                idx = idx.to_frame()
-        elif type(idx) is tuple:
-            # Single cell selection
-            idx = self._idx_table().iloc[idx[0]:idx[0] + 1,
-                                         idx[1]:idx[1] + 1]
-        return idx
-
-    def _idx_table(self):
-        ''' private method that generates a dataframe of triangle indices.
-            The dataframe is meant ot be sliced using pandas and the resultant
-            indices are then to be extracted from the Triangle object.
-        '''
-        df = pd.DataFrame(list(self.kdims), columns=self.key_labels)
-        for num, item in enumerate(self.vdims):
-            df[item] = list(zip(np.arange(len(df)),
-                            (np.ones(len(df))*num).astype(int)))
-        df.set_index(self.key_labels, inplace=True)
-        return df
+    def _key_index(self):
+        ''' Index of the keys, as pandas would set it from the key labels,
+            cached for label based selection '''
+        index = self.__dict__.get('_kindex', None)
+        if index is None or list(index.names) != list(self.key_labels):
+            index = self.index.set_index(self.key_labels).index
+            self._kindex = index
+        return index
+
+    def _align_keys(self, key):
+        ''' Values of a Series aligned to the index axis as pandas aligns
+            boolean selections and groupby keys '''
+        index = pd.RangeIndex(self.shape[0])
+        if key.index.equals(index):
+            return key.values
+        if isinstance(key.index, pd.MultiIndex) or \
+           key.index.name in self.key_labels:
+            index = self._key_index()
+        if not index.isin(key.index).all():
+            raise ValueError('Series index does not align with the index of '
+                             'the Triangle')
+        return key.reindex(index).values
 
     def __getitem__(self, key):
         ''' Function for pandas style column indexing'''
@@ -101,25 +146,23 @@ class TriangleSlicer:
                 return self._slice_valuation(key)
             return self._slice_origin(key)
         elif type(key) is pd.Series:
-            return self.iloc[list(self.index[key].index)]
+            return self.iloc[np.flatnonzero(self._align_keys(key).astype(bool))]
         elif key in self.key_labels:
             # Boolean-indexing of a particular key
             return self.index[key]
+        elif type(key) is slice:
+            return self.iloc[key]
         else:
-            idx = self._idx_table()[key]
-            idx = self._idx_table_format(idx)
-            obj = _LocBase(self).get_idx(idx)
-            return obj
+            columns = pd.Series(np.arange(len(self.vdims)), index=self.columns)
+            return _LocBase(self).get_idx(slice(None), columns.loc[key])
 
     def __setitem__(self, key, value):
         ''' Function for pandas style column indexing setting '''
-        idx = self._idx_table()
-        idx[key] = 1
         if key in self.vdims:
             i = np.where(self.vdims == key)[0][0]
-            self.values[:, i:i+1] = value.values
+            self._own_values()[:, i:i+1] = value.values
         else:
-            self.vdims = np.array(idx.columns.unique())
+            self.vdims = np.array(self.columns.append(pd.Index([key])))
             xp = cp.get_array_module(self.values)
             try:
                 self.values = xp.concatenate((self.values, value.values), axis=1)
@@ -132,18 +175,20 @@ class TriangleSlicer:
 
     def _slice_origin(self, key):
         ''' private method for handling of origin slicing '''
-        obj = copy.deepcopy(self)
+        obj = self._copy(values=False)
         obj.odims = obj.odims[key]
-        obj.values = obj.values[..., key, :]
+        obj.values = obj._owned(self.values[..., key, :], self.values)
         return self._cleanup_slice(obj)
 
     def _slice_valuation(self, key):
         ''' private method for handling of valuation slicing '''
-        obj = copy.deepcopy(self)
-        obj.valuation_date = min(
-            obj.valuation[key].max(), obj.valuation_date)
+        obj = self._copy(values=False)
+        months = self._valuation_ordinals()[key]
+        if len(months):
+            obj.valuation_date = min(
+                self._period_end([months.max()])[0], obj.valuation_date)
         key = key.reshape(self.shape[-2:], order='f')
-        nan_tri = np.ones(self.shape[-2:])
+        nan_tri = np.ones(self.shape[-2:], dtype=self.values.dtype)
         nan_tri = key*nan_tri
         nan_tri[nan_tri == 0] = np.nan
         o, d = nan_tri.shape
@@ -152,25 +197,25 @@ class TriangleSlicer:
         obj.odims = obj.odims[np.sum(np.isnan(nan_tri), 1) != d]
         if len(obj.ddims) > 1:
             obj.ddims = obj.ddims[np.sum(np.isnan(nan_tri), 0) != o]
-        xp = cp.get_array_module(obj.values)
+        xp = cp.get_array_module(self.values)
         if xp == cp:
             nan_tri = cp.array(nan_tri)
-        obj.values = (obj.values*nan_tri)
+        obj.values = (self.values*nan_tri)
         obj.values = xp.take(xp.take(obj.values, o_idx, -2), d_idx, -1)
         return self._cleanup_slice(obj)
 
     def _slice_development(self, key):
         ''' private method for handling of development slicing '''
-        obj = copy.deepcopy(self)
+        obj = self._copy(values=False)
         obj.ddims = obj.ddims[key]
-        if cp.get_array_module(obj.values) == cp:
+        if cp.get_array_module(self.values) == cp:
             key = cp.array(key)
-        obj.values = obj.values[..., key]
+        obj.values = obj._owned(self.values[..., key], self.values)
         return self._cleanup_slice(obj)
 
     def _cleanup_slice(self, obj):
         ''' private method with common post-slicing functionality'''
-        obj.valuation = obj._valuation_triangle()
+        obj._reset_valuation()
         if hasattr(obj, '_nan_triangle_'):
             # Force update on _nan_triangle at next access.
             del obj._nan_triangle_
@@ -3,10 +3,20 @@ import pandas as pd
 import numpy as np
 from chainladder.utils.cupy import cp
 import copy
+import os
+import pickle
+import pytest
 
 tri = cl.load_dataset('clrd')
 qtr = cl.load_dataset('quarterly')
 
+
+def load_csv(name, **kwargs):
+    ''' Raw records of a sample dataset '''
+    return pd.read_csv(os.path.join(
+        os.path.dirname(cl.__file__), 'utils', 'data', name + '.csv'), **kwargs)
+
+
 # Test Triangle slicing
 def test_slice_by_boolean():
     assert tri[tri['LOB'] == 'ppauto'].loc['Wolverine Mut Ins Co']['CumPaidLoss'] == \
@@ -287,6 +297,15 @@ def test_broadcasting():
     assert t1.broadcast_axis('columns', t2.columns).shape[1] == t2.shape[1]
     assert t1.broadcast_axis('index', t2.index).shape[0] == t2.shape[0]
 
+
+def test_broadcast_axis_is_a_view():
+    raa = cl.load_dataset('raa')
+    wide = raa.broadcast_axis('index', tri.index)
+    assert wide.values.strides[0] == 0
+    assert wide.sum(axis=0) == raa * len(tri.index)
+    wide['values'] = wide['values'] * 2
+    assert raa == cl.load_dataset('raa')
+
 def test_slicers_honor_order():
     clrd = cl.load_dataset('clrd').groupby('LOB').sum()
     assert clrd.iloc[[1,0], :].iloc[0, 1] == clrd.iloc[1, 1] #row
@@ -319,3 +338,409 @@ def test_jagged_2_add():
     raa2 = raa[raa.development>48]
     assert raa2 + raa1 == raa
     assert raa2.dropna() + raa1.dropna() == raa
+
+def test_construction_sums_duplicates_and_drops_missing_keys():
+    df = load_csv('clrd')
+    kwargs = dict(origin='AccidentYear', development='DevelopmentYear',
+                  index=['LOB'], columns=['CumPaidLoss', 'IncurLoss'])
+    missing = df.iloc[:5].copy()
+    missing['LOB'] = np.nan
+    a = cl.Triangle(pd.concat((df, df, missing)), **kwargs)
+    b = cl.Triangle(df.groupby(['AccidentYear', 'DevelopmentYear', 'LOB'])
+                      .sum().reset_index(), **kwargs)
+    xp = cp.get_array_module(a.values)
+    xp.testing.assert_array_equal(a.values, 2*b.values)
+    xp.testing.assert_array_equal(a.kdims, b.kdims)
+
+
+def test_multi_field_dates():
+    df = load_csv('prism')
+    kwargs = dict(index=['Line', 'Type'], columns='Paid')
+    a = cl.Triangle(df, origin='AccYrMo', development='ValYrMo', **kwargs)
+    for item in ['AccYrMo', 'ValYrMo']:
+        df[item + 'Yr'] = df[item].str[:4].astype(int)
+        df[item + 'Mo'] = df[item].str[-2:].astype(int)
+    b = cl.Triangle(df, origin=['AccYrMoYr', 'AccYrMoMo'],
+                    development=['ValYrMoYr', 'ValYrMoMo'], **kwargs)
+    df['ValYrMoMo'] = df['ValYrMoMo'].astype(str)
+    c = cl.Triangle(df, origin=['AccYrMoYr', 'AccYrMoMo'],
+                    development=['ValYrMoYr', 'ValYrMoMo'], **kwargs)
+    assert a == b == c
+    assert np.all(a.odims == b.odims) and np.all(a.ddims == c.ddims)
+
+
+def test_quarter_field_dates():
+    df = cl.load_dataset('quarterly').dev_to_val()['paid'] \
+           .to_frame().unstack().dropna().reset_index()
+    df.columns = ['development', 'origin', 'paid']
+    df['year'] = df['development'].dt.year
+    df['qtr'] = df['development'].dt.quarter
+    df['origin'] = df['origin'].astype(str)
+    a = cl.Triangle(df, origin='origin', development=['year', 'qtr'],
+                    columns='paid', cumulative=True)
+    assert a == cl.load_dataset('quarterly')['paid']
+
+
+def test_inferred_date_format_not_reused():
+    df = pd.DataFrame({'origin': ['2008-01-01', '2009-01-01'],
+                       'development': ['2010-01-01'] * 2, 'paid': [1., 2.]})
+    a = cl.Triangle(df, origin='origin', development='development',
+                    columns='paid', cumulative=True)
+    df['origin'], df['development'] = ['200801', '200901'], ['201001'] * 2
+    b = cl.Triangle(df, origin='origin', development='development',
+                    columns='paid', cumulative=True)
+    assert np.all(a.odims == b.odims) and np.all(a.ddims == b.ddims)
+
+
+def test_many_distinct_multilevel_keys():
+    # The product of the level cardinalities far exceeds the observed keys
+    n = 20000
+    df = pd.DataFrame({'a': np.arange(n), 'b': np.arange(n)[::-1],
+                       'c': np.arange(n) * 3, 'd': np.arange(n) % 7919,
+                       'origin': 2000 + np.arange(n) % 5, 'development': 2005,
+                       'paid': 1.})
+    a = cl.Triangle(df, origin='origin', development='development',
+                    index=['a', 'b', 'c', 'd'], columns='paid')
+    assert a.shape[0] == n and a.sum().sum().sum() == n
+    assert a.kdims[1].tolist() == [1, n - 2, 3, 1]
+
+
+def test_index_keys_do_not_collide():
+    df = pd.DataFrame({'a': ['ab', 'a'], 'b': ['c', 'bc'], 'origin': [2000]*2,
+                       'development': [2001]*2, 'loss': [1., 2.]})
+    a = cl.Triangle(df, origin='origin', development='development',
+                    index=['a', 'b'], columns='loss')
+    assert a.shape[0] == 2
+    assert a.groupby(['a', 'b']).sum().shape[0] == 2
+
+
+def test_groupby_mean_excludes_other_groups():
+    a = tri['CumPaidLoss'].groupby('LOB').mean().loc['comauto']
+    b = tri['CumPaidLoss'][tri['LOB'] == 'comauto'].mean()
+    xp = cp.get_array_module(a.values)
+    xp.testing.assert_array_almost_equal(a.values, b.values)
+
+
+def test_groupby_series_and_array():
+    lob = tri.index['LOB']
+    expected = tri.groupby('LOB').sum()
+    assert tri.groupby(lob.sample(frac=1, random_state=0)).sum() == expected
+    assert tri.groupby(lob.values).sum() == expected
+    assert tri.groupby(['GRNAME', lob]).sum() == tri
+
+
+def test_boolean_series_aligned_to_index():
+    mask = tri['LOB'] == 'comauto'
+    assert tri[mask.sample(frac=1, random_state=0)] == tri[mask]
+    with pytest.raises(ValueError):
+        tri[mask.iloc[:10]]
+
+
+def test_date_axes_fill_holes():
+    raa = cl.load_dataset('raa')
+    df = load_csv('raa')
+    df = df[(df['origin'] != 1984) & (df['development'] - df['origin'] != 4)]
+    a = cl.Triangle(df, origin='origin', development='development',
+                    columns='values')
+    assert a.shape == raa.shape
+    assert np.all(a.odims == raa.odims) and np.all(a.ddims == raa.ddims)
+
+
+def test_from_chunks():
+    chunks = load_csv('clrd', chunksize=1000)
+    a = cl.Triangle.from_chunks(
+        chunks, origin='AccidentYear', development='DevelopmentYear',
+        index=['GRNAME', 'LOB'], columns=tri.columns, cumulative=True)
+    assert a == tri
+    assert np.all(a.kdims == tri.kdims)
+
+
+def test_columnar_input():
+    df = load_csv('clrd')
+    kwargs = dict(origin='AccidentYear', development='DevelopmentYear',
+                  index=['GRNAME', 'LOB'], columns=tri.columns,
+                  cumulative=True)
+    pa = pytest.importorskip('pyarrow')
+    assert cl.Triangle(pa.Table.from_pandas(df), **kwargs) == tri
+    pl = pytest.importorskip('polars')
+    assert cl.Triangle(pl.from_pandas(df), **kwargs) == tri
+
+
+def test_from_sql():
+    import sqlite3
+    df = load_csv('clrd')
+    with sqlite3.connect(':memory:') as connection:
+        # Identifiers are quoted, so reserved words can name tables
+        pd.concat((df, df)).to_sql('order', connection, index=False)
+        a = cl.Triangle.from_sql(
+            connection, 'order', origin='AccidentYear',
+            development='DevelopmentYear', index=['GRNAME', 'LOB'],
+            columns=list(tri.columns), cumulative=True)
+    assert a == tri * 2
+
+
+def test_from_arrays():
+    raa = cl.load_dataset('raa')
+    for item in [tri, qtr, raa, raa.dev_to_val(), qtr.dev_to_val()]:
+        a = cl.Triangle.from_arrays(
+            item.values, item.kdims, item.vdims, item.odims, item.ddims,
+            item.origin_grain, item.development_grain, item.valuation_date,
+            key_labels=item.key_labels, cumulative=item.is_cumulative)
+        assert a == item and a.valuation_date == item.valuation_date
+        assert a.is_val_tri == item.is_val_tri
+        assert np.all(a.valuation == item.valuation)
+        xp = cp.get_array_module(a.values)
+        xp.testing.assert_array_equal(
+            a.link_ratio.values, item.link_ratio.values)
+        # Plain datetime64 axes and dates are accepted too
+        b = cl.Triangle.from_arrays(
+            item.values, item.kdims, item.vdims, np.asarray(item.odims),
+            np.asarray(item.ddims), item.origin_grain,
+            item.development_grain, item.valuation_date.to_datetime64(),
+            key_labels=item.key_labels, cumulative=item.is_cumulative)
+        assert b == item and b.valuation_date == item.valuation_date
+        assert np.all(b.valuation == item.valuation)
+
+
+def test_parallel_construction():
+    df = load_csv('clrd')
+    a = cl.Triangle(df, origin='AccidentYear', development='DevelopmentYear',
+                    index=['GRNAME', 'LOB'], columns=list(tri.columns),
+                    cumulative=True, n_jobs=2)
+    assert a == tri
+    assert np.all(a.kdims == tri.kdims)
+
+
+def test_append_diagonal():
+    df = load_csv('raa')
+    new = df[df['development'] == 1990].copy()
+    new['development'], new['values'] = 1991, new['values'] * 1.1
+    new = pd.concat((new, pd.DataFrame(
+        {'origin': [1991], 'development': [1991], 'values': [1000.]})))
+    kwargs = dict(origin='origin', development='development',
+                  columns='values', cumulative=True)
+    a = cl.Triangle(df[df['development'] < 1990], **kwargs)
+    a.link_ratio
+    a = a.append_diagonal(df[df['development'] == 1990], 'origin',
+                          'development')
+    assert a == cl.load_dataset('raa')
+    assert np.all(a.valuation == cl.load_dataset('raa').valuation)
+    b = a.append_diagonal(new, 'origin', 'development')
+    c = cl.Triangle(pd.concat((df, new)), **kwargs)
+    assert b == c and b.valuation_date == c.valuation_date
+    assert np.all(b.odims == c.odims) and np.all(b.ddims == c.ddims)
+    xp = cp.get_array_module(b.values)
+    xp.testing.assert_array_equal(b._nan_triangle(), c._nan_triangle())
+    df = load_csv('clrd')
+    kwargs = dict(origin='AccidentYear', development='DevelopmentYear',
+                  index=['GRNAME', 'LOB'], columns=list(tri.columns),
+                  cumulative=True)
+    a = cl.Triangle(df[df['DevelopmentYear'] < 1997], **kwargs)
+    a = a.append_diagonal(df[df['DevelopmentYear'] == 1997],
+                          'AccidentYear', 'DevelopmentYear')
+    assert a == tri
+    # Sliced multi-level triangles keep their keys as tuples
+    a = cl.Triangle(df[df['DevelopmentYear'] < 1997], **kwargs).iloc[:5]
+    new = df[(df['DevelopmentYear'] == 1997) &
+             df[['GRNAME', 'LOB']].apply(tuple, axis=1).isin(a.kdims)]
+    a = a.append_diagonal(new, 'AccidentYear', 'DevelopmentYear')
+    assert a.shape == tri.iloc[:5].shape and a == tri.iloc[:5]
+    new = df[df['DevelopmentYear'] == 1997].iloc[-1:]
+    a = a.append_diagonal(new, 'AccidentYear', 'DevelopmentYear')
+    assert a.shape[0] == 6
+    assert a.kdims[-1] == tuple(new[['GRNAME', 'LOB']].iloc[0])
+
+
+def test_copies_are_isolated():
+    raa = cl.load_dataset('raa')
+    for copies in [lambda x: [copy.deepcopy(x)],
+                   lambda x: [x.iloc[:, :], x['values'], -x, x * 2,
+                              x[x.origin >= '1985'], x.sum(axis=0)]]:
+        a = raa * 1
+        before = [item.values.copy() for item in copies(a)]
+        b = copies(a)
+        a.values[..., 0, 0] = 12345
+        for old, new in zip(before, b):
+            np.testing.assert_array_equal(new.values, old)
+            new.values[..., 0, 0] = 0
+        assert a.values[0, 0, 0, 0] == 12345
+    values = raa.values.copy()
+    a = cl.Triangle.from_arrays(
+        values, raa.kdims, raa.vdims, raa.odims, raa.ddims, raa.origin_grain,
+        raa.development_grain, raa.valuation_date)
+    cl.Chainladder().fit(a)
+    assert values.flags.writeable and a.values.flags.writeable
+
+
+def test_inplace_arithmetic():
+    a, b = tri['CumPaidLoss'], tri['BulkLoss']
+    for op in ['add', 'sub', 'mul', 'truediv']:
+        expected = getattr(a, '__{}__'.format(op))(b)
+        c = copy.deepcopy(a)
+        c = getattr(c, '__i{}__'.format(op))(b)
+        assert c == expected
+        values = c._own_values()
+        c = getattr(a, op)(2, out=c)
+        assert c.values is values
+        assert c == getattr(a, '__{}__'.format(op))(2)
+        # out may alias the other operand
+        c = copy.deepcopy(b)
+        assert getattr(a, op)(c, out=c) == expected
+        c = copy.deepcopy(a)
+        assert getattr(c, op)(c, out=c) == getattr(a, '__{}__'.format(op))(a)
+    total = tri['CumPaidLoss'] * 0
+    for i in range(3):
+        total += a
+    assert total == a * 3
+
+
+def test_lazy_arithmetic():
+    paid, bulk, prem = tri['CumPaidLoss'], tri['BulkLoss'], tri['EarnedPremDIR']
+    expected = [(paid - bulk) / prem * 1.05, 1 - paid / (paid + bulk) ** 2,
+                100 / paid.latest_diagonal - paid.latest_diagonal]
+    cl.lazy_arithmetic(True)
+    try:
+        actual = [(paid - bulk) / prem * 1.05, 1 - paid / (paid + bulk) ** 2,
+                  100 / paid.latest_diagonal - paid.latest_diagonal]
+    finally:
+        cl.lazy_arithmetic(False)
+    assert '_expr' in actual[0].__dict__
+    assert actual[0].shape == expected[0].shape
+    # Pending expressions survive pickling
+    assert '_expr' in pickle.loads(pickle.dumps(actual[1])).__dict__
+    actual[1] = pickle.loads(pickle.dumps(actual[1]))
+    # Operands are snapshot rather than frozen until the result is evaluated
+    paid = paid * 1
+    cl.lazy_arithmetic(True)
+    try:
+        actual.append(paid * 2)
+    finally:
+        cl.lazy_arithmetic(False)
+    expected.append(paid * 2)
+    assert paid.values.flags.writeable
+    paid._own_values()[0, 0, 0, 0] = 0
+    for a, b in zip(actual, expected):
+        xp = cp.get_array_module(b.values)
+        xp.testing.assert_array_almost_equal(a.values, b.values)
+
+
+def test_packed_storage():
+    data = load_csv('clrd')
+    kwargs = dict(origin='AccidentYear', development='DevelopmentYear',
+                  index=['GRNAME', 'LOB'], columns=['CumPaidLoss', 'BulkLoss'],
+                  cumulative=True)
+    packed = cl.Triangle(data, packed=True, **kwargs)
+    assert packed.is_packed and packed._packed.shape == (775, 2, 55)
+    assert packed.shape == tri[['CumPaidLoss', 'BulkLoss']].shape
+    selected = packed['CumPaidLoss'].iloc[:100].sum() * 1.1
+    assert selected.is_packed
+    assert selected == tri['CumPaidLoss'].iloc[:100].sum() * 1.1
+    assert not selected.is_packed
+    assert packed == tri[['CumPaidLoss', 'BulkLoss']].pack()
+    raa = cl.load_dataset('raa')
+    assert cl.Chainladder().fit(raa.pack()).ultimate_ == \
+        cl.Chainladder().fit(raa).ultimate_
+
+
+def test_valuation_from_period_ordinals():
+    valuation = pd.DataFrame(
+        qtr.valuation.values.reshape(qtr.shape[-2:], order='f'))
+    origin = qtr.origin.to_timestamp(how='s')
+    for num, lag in enumerate(qtr.ddims):
+        expected = (origin + pd.DateOffset(months=int(lag)) -
+                    pd.Timedelta(1, 'ns'))
+        assert (valuation[num].values == expected.values).all()
+
+
+def test_index_from_codes():
+    assert tri._kcodes.dtype.itemsize == 2
+    assert tri.index.equals(
+        pd.DataFrame(list(tri.kdims), columns=tri.key_labels))
+    assert (tri.iloc[:5].index.dtypes == object).all()
+    assert set(tri.iloc[:5].index['LOB']) == \
+        set(item[1] for item in tri.kdims[:5])
+    assert tri.index is not tri.index
+    index = tri.index
+    index.iloc[0, 0] = index.iloc[-1, 0]
+    assert tri.index.iloc[0, 0] == tri.kdims[0][0] != index.iloc[0, 0]
+    wkcomp = tri[tri['LOB'] == 'wkcomp']
+    assert (wkcomp.index['LOB'] == 'wkcomp').all()
+    assert list(wkcomp.kdims[0]) == ['Agway Ins Co', 'wkcomp']
+    assert tri.loc['Aegis Grp'].kdims.tolist() == \
+        ['comauto', 'othliab', 'ppauto']
+    total = tri.sum()
+    assert total.kdims[0] is None and total.index.iloc[0, 0] is None
+
+
+def test_valuation_selection_by_ordinals():
+    for item in [qtr, tri.grain('OYDY'), qtr.dev_to_val(),
+                 cl.Chainladder().fit(qtr).full_triangle_]:
+        assert (item._valuation_ordinals() ==
+                item._month_ordinal(item._valuation_triangle())).all()
+        assert (item._valuation_ordinals() ==
+                item._month_ordinal(item.valuation)).all()
+    legacy = qtr[qtr.valuation == qtr.valuation_date].sum('development')
+    assert qtr.latest_diagonal == legacy
+    weight = cl.Development()._assign_n_periods_weight_int(qtr, 3)
+    val_min = qtr.valuation[qtr.valuation <= qtr.valuation_date]
+    legacy = qtr[qtr.valuation >= val_min.unique().sort_values()[-13]]
+    np.testing.assert_equal(
+        weight, np.nan_to_num((legacy / legacy).values) * qtr._nan_triangle())
+
+
+def test_shared_nan_triangle_cache():
+    from chainladder.core.base import _nan_triangle_cache, _MaskCache
+    raa = cl.load_dataset('raa')
+    first, second = raa.iloc[0, 0], copy.deepcopy(raa)
+    second.__dict__.pop('_nan_triangle_', None)
+    hits = _nan_triangle_cache.cache_info().hits
+    assert first._nan_triangle() is second._nan_triangle()
+    assert _nan_triangle_cache.cache_info().hits > hits
+    assert not first._nan_triangle().flags.writeable
+    cache = _MaskCache(maxsize=2)
+    for item in range(3):
+        cache.get(item, lambda: np.ones(1))
+    assert cache.get(0, lambda: None) is None
+    assert cache.cache_info() == (0, 4, 2, 2)
+
+
+def test_dev_to_val_carries_cumulative_forward():
+    raa = cl.load_dataset('raa')
+    holes = copy.deepcopy(raa)
+    holes.values = raa.values.copy()
+    holes.values[..., 0, 3] = np.nan
+    val = holes.dev_to_val()
+    assert val.values[0, 0, 0, 3] == raa.values[0, 0, 0, 2]
+    assert np.isnan(val.values[0, 0, 1, 0])
+    assert holes.dev_to_val().val_to_dev().values[0, 0, 0, 3] == \
+        raa.values[0, 0, 0, 2]
+
+
+def test_grain_sums_origin_blocks():
+    origin, lag = np.triu_indices(30)
+    dates = pd.date_range('2000-01-01', periods=30, freq='MS')
+    monthly = cl.Triangle(
+        pd.DataFrame({'origin': dates[origin], 'development': dates[lag],
+                      'loss': np.arange(len(origin), dtype=float) + 1}),
+        origin='origin', development='development', columns='loss',
+        cumulative=True)
+    yearly = monthly.grain('OYDM')
+    assert yearly.shape == (1, 1, 3, 30)
+    expected = monthly.dev_to_val().to_frame().groupby(
+        lambda x: x.year).sum()
+    assert (yearly.dev_to_val().to_frame().fillna(0).values ==
+            expected.values).all()
+    assert (monthly.grain('OYDQ').ddims == np.arange(3, 31, 3)).all()
+
+
+def test_selection_by_key_index():
+    assert tri._key_index() is tri._key_index()
+    assert tri.iloc[5:2:-1].shape[0] == len(tri.iloc[5:2:-1].kdims) == 3
+    assert tri.iloc[5:2:-1] == tri.iloc[[5, 4, 3]]
+    keys = [('Aegis Grp', 'comauto'), ('Adriatic Ins Co', 'ppauto')]
+    assert tri.loc[keys] == tri.iloc[[2, 1]]
+    assert tri.loc['Aegis Grp', ['CumPaidLoss', 'BulkLoss']] == \
+        tri.loc['Aegis Grp'].iloc[:, [1, 2]]
+    assert tri.loc[('Aegis Grp', 'comauto'), 'CumPaidLoss'] == \
+        tri['CumPaidLoss'].iloc[2]
+    assert not np.shares_memory(tri.iloc[3:8, 1].values, tri.values)
@@ -6,6 +6,7 @@ import pandas as pd
 import numpy as np
 from chainladder.utils.cupy import cp
 import copy
+import warnings
 
 
 from chainladder.core.base import TriangleBase
@@ -19,7 +20,8 @@ class Triangle(TriangleBase):
     ----------
     data : DataFrame
         A single dataframe that contains columns represeting all other
-        arguments to the Triangle constructor
+        arguments to the Triangle constructor.  A pyarrow Table or polars
+        DataFrame is also accepted and aggregated with its own engine.
     origin : str or list
          A representation of the accident, reporting or more generally the
          origin period of the triangle that will map to the Origin dimension
@@ -43,6 +45,17 @@ class Triangle(TriangleBase):
         Whether the triangle is cumulative or incremental.  This attribute is
         required to use the `grain` and `dev_to_val` methods and will be
         automatically set when invoking `cum_to_incr` or `incr_to_cum` methods.
+    n_jobs : int or None
+        The number of processes used to assemble the index partitions of the
+        triangle.  None means 1, -1 means using all processors.
+    packed : bool
+        Whether to store only the observed cells of the triangle rather than
+        the full origin by development rectangle.  See ``pack``.
+    dtype : str or dtype, optional
+        The floating point type of the values.  Development patterns, tails,
+        Chainladder, MackChainladder and BootstrapODPSample results inherit
+        the dtype of the triangle they are fit to, so ``'float32'`` halves
+        their memory footprint.  See also ``astype``.
 
     Attributes
     ----------
@@ -75,6 +88,8 @@ class Triangle(TriangleBase):
     is_val_tri:
         Whether the triangle development period is expressed as valuation
         periods.
+    is_packed:
+        Whether only the observed cells of the triangle are stored.
     values : array
         4D numpy array underlying the Triangle instance
     T : Triangle
@@ -83,17 +98,29 @@ class Triangle(TriangleBase):
     """
     @property
     def shape(self):
+        if '_expr' in self.__dict__:
+            return self._expr.shape
+        if '_packed' in self.__dict__:
+            return self._packed.shape[:2] + (len(self.odims), len(self.ddims))
         return self.values.shape
 
     @property
     def index(self):
-        return pd.DataFrame(list(self.kdims), columns=self.key_labels)
+        index = self.__dict__.get('_index', None)
+        if index is None or list(index.columns) != list(self.key_labels):
+            # Keys are taken from the categories of each level by code
+            index = pd.DataFrame({
+                num: level[code] for num, (code, level) in enumerate(
+                    zip(self._kcodes.T, self._klevels))})
+            index.columns = self.key_labels
+            self._index = index
+        return index.copy()
 
     @index.setter
     def index(self, value):
         self._len_check(self.index, value)
         if type(value) is pd.DataFrame:
-            self.kdims = value.values
+            self._set_index(value)
             self._set_slicers()
         else:
             raise TypeError('index must be a pandas DataFrame')
@@ -109,7 +136,7 @@ class Triangle(TriangleBase):
 
     @property
     def columns(self):
-        return self._idx_table().columns
+        return pd.Index(self.vdims)
 
     @columns.setter
     def columns(self, value):
@@ -146,12 +173,17 @@ class Triangle(TriangleBase):
 
     @property
     def is_ultimate(self):
-        return sum(self.valuation >= '2262') > 0
+        return bool((self._valuation_ordinals() >=
+                     self._month_ordinal(['2262'])[0]).any())
 
     @property
     def is_val_tri(self):
         return (type(self.ddims) == pd.DatetimeIndex)
 
+    @property
+    def is_packed(self):
+        return '_packed' in self.__dict__
+
     @property
     def latest_diagonal(self):
         return self._get_latest_diagonal()
@@ -195,15 +227,13 @@ class Triangle(TriangleBase):
             offset = {'M': {'Y': 12, 'Q': 3, 'M': 1},
                       'Q': {'Q': 1, 'Y': 4},
                       'Y': {'Y': 1}}
-            val_idx = self.valuation.unique().sort_values()
-            val_idx = val_idx[val_idx <= self.valuation_date]
+            months = self._valuation_ordinals()
+            val_idx = np.unique(months[months <= self._valuation_cutoff()])
             val_idx = val_idx[-offset[self.development_grain][self.origin_grain]:]
-            val_min, val_max = val_idx.min(), val_idx.max()
-            diagonal = obj[obj.valuation >= val_min]
-            diagonal = diagonal[diagonal.valuation <= val_max]
-            return diagonal
+            return obj[(months >= val_idx.min()) & (months <= val_idx.max())]
         if compress:
-            diagonal = obj[obj.valuation == obj.valuation_date].values
+            diagonal = obj[
+                self._valuation_ordinals() == self._valuation_cutoff()].values
             diagonal = xp.expand_dims(xp.nansum(diagonal, 3), 3)
             obj.ddims = np.array([None])
             obj.valuation = pd.DatetimeIndex(
@@ -227,9 +257,10 @@ class Triangle(TriangleBase):
         xp = cp.get_array_module(self.values)
         if inplace:
             if not self.is_cumulative:
-                xp.cumsum(xp.nan_to_num(self.values), axis=3, out=self.values)
+                xp.cumsum(xp.nan_to_num(self.values), axis=3,
+                          out=self._own_values())
                 self.values = self._expand_dims(self._nan_triangle())*self.values
-                self.values[self.values == 0] = np.nan
+                self._nan_zeros()
                 self.is_cumulative = True
                 self._set_slicers()
             return self
@@ -265,6 +296,172 @@ class Triangle(TriangleBase):
             new_obj = copy.deepcopy(self)
             return new_obj.cum_to_incr(inplace=True)
 
+    def pack(self, inplace=False):
+        """Method to store only the observed cells of the triangle, i.e. those
+        valued no later than the valuation_date, rather than the full origin
+        by development rectangle.  Index and column selection, aggregation
+        over the index or columns and scaling by a scalar keep the triangle
+        packed.  Other operations expand the values when they are accessed.
+
+        Parameters
+        ----------
+        inplace: bool
+            Set to True will update the instance data attribute inplace
+
+        Returns
+        -------
+            Updated instance of triangle in packed storage
+        """
+        if inplace:
+            if not self.is_packed:
+                xp = cp.get_array_module(self.values)
+                cells = self._observed_cells()
+                values = self.values.reshape(self.shape[:2] + (-1,))
+                future = np.ones(values.shape[-1], dtype=bool)
+                future[cells] = False
+                if xp.any(~xp.isnan(values[..., future])):
+                    raise ValueError('Only triangles without values beyond '
+                                     'the valuation_date can be packed.')
+                self._packed = values[..., cells]
+                self._cells = cells
+                del self._values
+            return self
+        else:
+            new_obj = copy.deepcopy(self)
+            return new_obj.pack(inplace=True)
+
+    def append_diagonal(self, data, origin=None, development=None,
+                        index=None, columns=None, origin_format=None,
+                        development_format=None, inplace=False):
+        """Method to add the observations of a new valuation to the triangle
+        without rebuilding it from the full history.  Cells present in data
+        replace existing values and the origin, development and index axes
+        are extended as needed, with new index keys placed after existing
+        ones.
+
+        Parameters
+        ----------
+        data: DataFrame
+            The new observations in the same tabular form used to construct
+            the triangle
+        origin, development, origin_format, development_format:
+            See Triangle
+        index, columns:
+            See Triangle.  Default to the key_labels and columns of the
+            triangle.
+        inplace: bool
+            Set to True will update the instance data attribute inplace
+
+        Returns
+        -------
+            Updated instance of triangle with the new diagonal
+        """
+        if not inplace:
+            new_obj = copy.deepcopy(self)
+            return new_obj.append_diagonal(
+                data, origin, development, index, columns, origin_format,
+                development_format, inplace=True)
+        if self.is_val_tri or not np.issubdtype(
+           np.asarray(self.ddims).dtype, np.integer):
+            raise ValueError(
+                'append_diagonal requires a development lag triangle')
+        xp = cp.get_array_module(self.values)
+        if index is None and self.key_labels != ['Total']:
+            index = self.key_labels
+        columns = list(self.vdims) if columns is None else columns
+        index, columns, origin, development = self._str_to_list(
+            index, columns, origin, development)
+        m_cnt = {'Y': 12, 'Q': 3, 'M': 1}
+        o_grain = m_cnt[self.origin_grain]
+        d_grain = m_cnt[self.development_grain]
+        # Locate each observation on the (possibly extended) axes
+        codes = [self._factorize(data, item)
+                 for item in [origin, development] + ([index] if index else [])]
+        data = data[np.all([item[0] >= 0 for item in codes], axis=0)]
+        codes = [self._factorize(data, item)
+                 for item in [origin, development] + ([index] if index else [])]
+        origin_date = self._to_datetime(
+            codes[0][1], origin, format=origin_format)
+        development_date = self._to_datetime(
+            codes[1][1], development, period_end=True,
+            format=development_format)
+        start = self._month_ordinal(pd.Series(self.odims[:1]))[0] // o_grain
+        o_month = self._month_ordinal(origin_date)[codes[0][0]]
+        o_month = o_month // o_grain * o_grain
+        d_month = self._month_ordinal(development_date)[codes[1][0]]
+        orig_idx = o_month // o_grain - start
+        dev_idx = d_month // d_grain - o_month // d_grain + 1 - \
+            self.ddims[0] // d_grain
+        valid = d_month >= o_month
+        if not valid.all():
+            warnings.warn("Observations with development before origin start have been removed.")
+        if (orig_idx[valid] < 0).any() or (dev_idx[valid] < 0).any():
+            raise ValueError('Observations precede the axes of the triangle')
+        if index:
+            lookup = {item: num for num, item in enumerate(
+                self.index.itertuples(index=False, name=None))}
+            key = [tuple(item) for item in codes[2][1].values]
+            new_keys = [item for item in key if item not in lookup]
+            lookup.update({item: len(lookup) + num
+                           for num, item in enumerate(new_keys)})
+            k_idx = np.array([lookup[item] for item in key])[codes[2][0]]
+            if new_keys:
+                kdims = self.kdims
+                if self._kform == 'tuple':
+                    added = np.empty(len(new_keys), dtype=object)
+                    added[:] = new_keys
+                elif kdims.ndim > 1:
+                    added = np.array(new_keys, dtype=kdims.dtype)
+                else:
+                    added = np.array([item[0] for item in new_keys],
+                                     dtype=kdims.dtype)
+                self.kdims = np.concatenate((kdims, added), axis=0)
+        else:
+            k_idx = np.zeros(len(data), dtype=int)
+        k_idx, orig_idx, dev_idx = k_idx[valid], orig_idx[valid], dev_idx[valid]
+        # Extend the origin and development axes to the new valuation
+        valuation_date = max(self.valuation_date, development_date.max())
+        end = max(self._month_ordinal(pd.Series([valuation_date]))[0],
+                  o_month.max())
+        n_o = max(len(self.odims), end // o_grain - start + 1)
+        n_d = max(len(self.ddims), dev_idx.max() + 1,
+                  end // d_grain - start * o_grain // d_grain + 1 -
+                  self.ddims[0] // d_grain + 1)
+        shape = (len(self.kdims), len(self.vdims), n_o, n_d)
+        grown = shape[2:] != self.shape[2:] or \
+            (self.odims > np.datetime64(self.valuation_date)).any()
+        if shape != self.shape:
+            values = xp.full(shape, xp.nan, dtype=self.values.dtype)
+            values[tuple(slice(0, item) for item in self.shape)] = self.values
+            self.values = values
+            self.odims = ((np.arange(n_o) + start) * o_grain) \
+                .astype('datetime64[M]').astype('datetime64[ns]')
+            self.ddims = self.ddims[0] + np.arange(n_d) * d_grain
+        # Write the new cells, summing duplicate observations
+        cell, inverse = np.unique(np.ravel_multi_index(
+            (k_idx, orig_idx, dev_idx), (shape[0],) + shape[2:]),
+            return_inverse=True)
+        cell = np.unravel_index(cell, (shape[0],) + shape[2:])
+        for column in columns:
+            amts = np.nan_to_num(data[column].values[valid].astype('float64'))
+            amts = np.bincount(inverse, weights=amts, minlength=len(cell[0]))
+            amts[amts == 0] = np.nan
+            self._own_values()[cell[0], list(self.vdims).index(column),
+                               cell[1], cell[2]] = xp.array(amts)
+        # Refresh valuations, reusing the cached NaN triangle when possible
+        self.valuation_date = valuation_date
+        if grown:
+            self.valuation = None
+            self.__dict__.pop('_nan_triangle_', None)
+        elif hasattr(self, '_nan_triangle_'):
+            val_array = self._valuation_ordinals().reshape(
+                shape[2:], order='f')
+            self._nan_triangle_ = xp.where(xp.array(
+                val_array <= self._valuation_cutoff()), 1,
+                self._nan_triangle_).astype('float16')
+        self._set_slicers()
+        return self
+
     def dev_to_val(self, inplace=False):
         ''' Converts triangle from a development lag triangle to a valuation
         triangle.
@@ -305,18 +502,19 @@ class Triangle(TriangleBase):
             ret_val = self
         else:
             if self.is_ultimate:
-                obj = self[self.valuation<'2262']
-                non_ultimates = obj.values
+                ultimate = self._valuation_ordinals() >= \
+                    self._month_ordinal(['2262'])[0]
+                obj = self[~ultimate]
+                max_val = obj[obj.origin == obj.origin.max()].valuation.max()
                 obj = obj._val_dev_chg('val_to_dev')
-                ultimate = self[self.valuation>='2262']
-                max_val = self[self.valuation<'2262'][self.origin == self.origin.max()].valuation.max()
+                ultimate = self[ultimate]
                 max_dev = obj[obj.origin == obj.origin.max()]
                 max_dev = max_dev[max_dev.valuation == max_val].ddims[0]
                 obj = obj[obj.development <= max_dev]
                 obj.values = xp.concatenate(
                     (obj.values, ultimate.values), axis=-1)
                 obj.ddims = np.concatenate((obj.ddims, np.array([9999])))
-                obj.valuation = obj._valuation_triangle(obj.ddims)
+                obj._reset_valuation(obj.ddims)
                 obj.valuation_date = max(obj.valuation)
                 ret_val = obj
             else:
@@ -328,55 +526,50 @@ class Triangle(TriangleBase):
 
 
     def _val_dev_chg(self, kind):
+        ''' Moves each origin/development cell to its column on the other
+            axis with a single scatter.  Cumulative triangles carry their
+            latest amount forward into columns without a cell. '''
         xp = cp.get_array_module(self.values)
         obj = copy.deepcopy(self)
         if hasattr(obj, '_nan_triangle_'):
             del obj._nan_triangle_
-        o_vals = obj._expand_dims(xp.arange(len(obj.origin))[:, xp.newaxis])
         if self.shape[-1] == 1:
             return obj
         if kind == 'val_to_dev':
             step = {'Y': 12, 'Q': 3, 'M': 1}[obj.development_grain]
-            mtrx = \
-                12*(obj.ddims.year.values[np.newaxis] -
-                    obj.origin.to_timestamp(how='s')
-                       .year.values[:, np.newaxis]) + \
-                   (obj.ddims.month.values[np.newaxis] -
-                    obj.origin.to_timestamp(how='s')
-                       .month.values[:, np.newaxis]) + 1
-            rng = range(mtrx[mtrx > 0].min(), mtrx.max()+1, step)
+            mtrx = self._month_ordinal(obj.ddims)[np.newaxis] - \
+                self._month_ordinal(obj.odims)[:, np.newaxis] + 1
+            start = mtrx[mtrx > 0].min()
+            ddims = np.arange(start, mtrx.max() + 1, step)
+            column = (mtrx - start) // step
+            column[(mtrx < start) | ((mtrx - start) % step != 0)] = -1
         else:
-            rng = obj.valuation.unique().sort_values()
-        old_arr = None
-        for item in rng:
-            if kind == 'val_to_dev':
-                val = np.where(mtrx == item)
-            else:
-                val = np.where(obj._expand_dims(obj.valuation == item)
-                                  .reshape(obj.shape, order='f'))[-2:]
-            val = np.unique(np.array(list(zip(val[0], val[1]))), axis=0)
-            arr = xp.expand_dims(obj.values[:, :, val[:, 0], val[:, 1]], -1)
-            if val[0, 0] != 0:
-                prepend = obj._expand_dims(xp.array([xp.nan]*(val[0, 0]))[:, xp.newaxis])
-                arr = xp.concatenate((prepend, arr), -2)
-            if len(obj.origin)-1-val[-1, 0] != 0:
-                append = obj._expand_dims(
-                    xp.array([np.nan]*(len(obj.origin)-1-val[-1, 0]))[:, xp.newaxis])
-                arr = xp.concatenate((arr, append), -2)
-            if obj.is_cumulative and old_arr is not None:
-                arr = xp.isnan(arr)*xp.nan_to_num(old_arr) + xp.nan_to_num(arr)
-            old_arr = arr.copy()
-            o_vals = xp.concatenate((o_vals, arr), -1)
-        obj.values = o_vals[..., 1:]
-        obj.values[obj.values == 0] = xp.nan
+            months = obj._valuation_ordinals().reshape(
+                obj.shape[-2:], order='f')
+            ddims, column = np.unique(months, return_inverse=True)
+            # Valuations past the valuation_date are not kept
+            ddims = ddims[ddims <= obj._valuation_cutoff()]
+            column = column.reshape(months.shape)
+            column[column >= len(ddims)] = -1
+        o_idx, d_idx = np.nonzero(column >= 0)
+        values = xp.full(obj.shape[:-1] + (len(ddims),), xp.nan,
+                         dtype=obj.values.dtype)
+        values[..., xp.asarray(o_idx), xp.asarray(column[o_idx, d_idx])] = \
+            obj.values[..., xp.asarray(o_idx), xp.asarray(d_idx)]
+        if obj.is_cumulative:
+            # Forward fill each origin from its latest observed column
+            filled = xp.where(xp.isnan(values), 0, xp.arange(
+                len(ddims), dtype='int32'))
+            xp.maximum.accumulate(filled, axis=-1, out=filled)
+            values = xp.nan_to_num(
+                xp.take_along_axis(values, filled, axis=-1), copy=False)
+        obj.values = values
+        obj._nan_zeros()
         if kind == 'val_to_dev':
-            obj.ddims = np.array([item for item in rng])
-            obj.valuation = obj._valuation_triangle()
+            obj.ddims = ddims
+            obj._reset_valuation()
         else:
-            obj.ddims = obj.valuation.unique().sort_values()
-            obj.values = obj.values[..., :np.where(
-                obj.ddims <= obj.valuation_date)[0].max()+1]
-            obj.ddims = obj.ddims[obj.ddims <= obj.valuation_date]
+            obj.ddims = self._period_end(ddims)
             obj.valuation = pd.DatetimeIndex(
                 np.repeat(obj.ddims.values[np.newaxis],
                           len(obj.origin)).reshape(1, -1).flatten())
@@ -423,19 +616,20 @@ class Triangle(TriangleBase):
                 o = np.array(pd.to_datetime(o_dt.dt.year, format='%Y'))
             else:
                 o = obj.odims
-            o_new = np.unique(o)
-            o = np.repeat(np.expand_dims(o, axis=1), len(o_new), axis=1)
-            o_new = np.repeat(o_new[np.newaxis], len(o), axis=0)
-            o_bool = np.repeat((o == o_new)[:, np.newaxis],
-                               len(obj.ddims), axis=1)
-            o_bool = obj._expand_dims(o_bool)
-            new_tri = xp.repeat(xp.nan_to_num(obj.values)[..., xp.newaxis],
-                                o_bool.shape[-1], axis=-1)
-            new_tri[~np.isfinite(new_tri)] = 0
-            new_tri = np.swapaxes(np.sum(new_tri*o_bool, axis=2), -1, -2)
+            # Origins are sorted, so each new origin is a contiguous block
+            starts = np.flatnonzero(np.append(True, o[1:] != o[:-1]))
+            values = obj.values
+            new_tri = xp.empty(values.shape[:2] + (len(starts),) +
+                               values.shape[3:], dtype=values.dtype)
+            # Blocks of valuations are summed at a time to bound the
+            # temporary memory by the size of the result
+            step = max(1, values.shape[3] * len(starts) // len(o))
+            for num in range(0, values.shape[3], step):
+                new_tri[..., num:num + step] = xp.add.reduceat(xp.nan_to_num(
+                    values[..., num:num + step]), starts, axis=2)
             obj.values = new_tri
-            obj.odims = np.unique(o)
-            obj.valuation = obj._valuation_triangle()
+            obj.odims = o[starts]
+            obj._reset_valuation()
             if hasattr(obj, '_nan_triangle_'):
                 del obj._nan_triangle_
         obj = obj.val_to_dev(inplace=True)
@@ -446,15 +640,15 @@ class Triangle(TriangleBase):
         dgrain_new = grain[-1]
         dgrain_old = obj.development_grain
         if obj.shape[3] != 1:
-            keeps = dev_grain_dict[dgrain_old][dgrain_new]
-            keeps = np.where(np.arange(obj.shape[3]) % keeps == 0)[0]
-            keeps = -(keeps + 1)[::-1]
+            step = dev_grain_dict[dgrain_old][dgrain_new]
+            # Every step-th lag counting back from the last one
+            keeps = slice((obj.shape[3] - 1) % step, None, step)
             obj.values = obj.values[..., keeps]
             obj.ddims = obj.ddims[keeps]
         obj.origin_grain = ograin_new
         obj.development_grain = dgrain_new
-        obj.values[obj.values == 0] = xp.nan
-        obj.valuation = obj._valuation_triangle()
+        obj._nan_zeros()
+        obj._reset_valuation()
         if hasattr(obj, '_nan_triangle_'):
             # Force update on _nan_triangle at next access.
             del obj._nan_triangle_
@@ -495,8 +689,10 @@ class Triangle(TriangleBase):
         else:
             days = np.datetime64(valuation_date)
         if axis == 'origin':
+            origin_end = self._period_end(
+                self._month_ordinal(self.odims), self.origin_grain)
             trend = xp.array((1 + trend)**-(
-                pd.Series(self.origin.end_time.values-days).dt.days/365.25)
+                pd.Series(origin_end.values-days).dt.days/365.25)
                 )[xp.newaxis, xp.newaxis, ..., xp.newaxis]
         elif axis == 'valuation':
             valuation  = self.valuation
@@ -509,13 +705,15 @@ class Triangle(TriangleBase):
             trend = (1 + trend)**-(
                 pd.Series(valuation.end_time.values-days)
                 .dt.days.values.reshape(self.shape[-2:], order='f')/365.25)
-        obj = copy.deepcopy(self)
-        obj.values = obj.values*trend
+        obj = self._copy(values=False)
+        obj.values = self.values*trend
         return obj
 
     def broadcast_axis(self, axis, value):
         """ Broadcasts (i.e. repeats) triangles along an axis.  The axis to be
-        broadcast must be of length 1.
+        broadcast must be of length 1.  With the numpy backend the values are
+        a read-only view repeating a copy of the original values, and are
+        only materialized when they are written to.
 
         Parameters
         ----------
@@ -532,11 +730,16 @@ class Triangle(TriangleBase):
         elif axis > 1:
             raise ValueError('Only index and column axes are supported')
         else:
-            obj.values = xp.repeat(obj.values, len(value), axis)
+            if xp == np:
+                shape = list(obj.shape)
+                shape[axis] = len(value)
+                obj.values = np.broadcast_to(obj.values, tuple(shape))
+            else:
+                obj.values = xp.repeat(obj.values, len(value), axis)
             if axis == 0:
                 obj.key_labels = list(value.columns)
-                obj.kdims = value.values
-                obj.index = value
+                obj._set_index(value)
+                obj._set_slicers()
             if axis == 1:
                 obj.vdims = value.values
                 obj.columns = value
@@ -123,12 +123,12 @@ class Development(DevelopmentBase):
                 'Y': {'Y': 1},
                 'Q': {'Y':4, 'Q': 1},
                 'M': {'Y':12, 'Q': 3, 'M': 1}}
-            val_date_min = \
-                X.valuation[X.valuation<=X.valuation_date].drop_duplicates().sort_values()
+            months = X._valuation_ordinals()
+            val_date_min = np.unique(months[months <= X._valuation_cutoff()])
             val_date_min = \
                 val_date_min[-n_periods * \
                 val_offset[X.development_grain][X.origin_grain] - 1]
-            w = X[X.valuation>=val_date_min]
+            w = X[months >= val_date_min]
             return xp.nan_to_num((w/w).values)*X._expand_dims(X._nan_triangle())
 
 
@@ -178,9 +178,10 @@ class Development(DevelopmentBase):
             drop_valuation = [self.drop_valuation]
         else:
             drop_valuation = self.drop_valuation
-        arr = 1-xp.nan_to_num(X[X.valuation.isin(
-            pd.PeriodIndex(drop_valuation,
-                           freq=X.origin_grain).to_timestamp(how='e'))].values[0, 0]*0+1)
+        drop_valuation = X._month_ordinal(pd.PeriodIndex(
+            drop_valuation, freq=X.origin_grain).to_timestamp(how='e'))
+        arr = 1-xp.nan_to_num(X[np.isin(
+            X._valuation_ordinals(), drop_valuation)].values[0, 0]*0+1)
         ofill = X.shape[-2]-arr.shape[-2]
         dfill = X.shape[-1]-arr.shape[-1]
         if ofill > 0:
@@ -232,7 +233,7 @@ class Development(DevelopmentBase):
         weight_dict = {'regression': 0, 'volume': 1, 'simple': 2}
         x, y = tri_array[..., :-1], tri_array[..., 1:]
         val = xp.array([weight_dict.get(item.lower(), 1)
-                        for item in average])
+                        for item in average], dtype=tri_array.dtype)
         for i in [2, 1, 0]:
             val = xp.repeat(val[xp.newaxis], tri_array.shape[i], axis=0)
         val = xp.nan_to_num(val * (y * 0 + 1))
@@ -242,7 +243,7 @@ class Development(DevelopmentBase):
             link_ratio = xp.divide(y, x, where=xp.nan_to_num(x) != 0)
         self.w_ = xp.array(self._assign_n_periods_weight(X) *
                            self._drop_adjustment(X, link_ratio),
-                           dtype='float16')
+                           dtype=tri_array.dtype)
         w = self.w_ / (x**(val))
         params = WeightedRegression(axis=2, thru_orig=True).fit(x, y, w)
         if self.n_periods != 1:
@@ -286,11 +287,13 @@ class Development(DevelopmentBase):
         return X_new
 
     def _param_property(self, X, params, idx):
+        ''' Patterns are the same for every origin, so they are stored with a
+            single origin and broadcast against X where needed. '''
         obj = copy.copy(X)
-        xp = cp.get_array_module(X.values)
-        obj.values = xp.ones(X.shape)[..., :-1]*params[..., idx:idx+1, :]
+        obj.values = params[..., idx:idx+1, :]
+        obj.odims = X.odims[:1]
         obj.ddims = X.link_ratio.ddims
-        obj.valuation = obj._valuation_triangle(obj.ddims)
+        obj._reset_valuation(obj.ddims)
         obj.nan_override = True
         obj._set_slicers()
         return obj
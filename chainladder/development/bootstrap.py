@@ -103,9 +103,17 @@ class BootstrapODPSample(DevelopmentBase):
         if X.shape[:2] != (1, 1):
             raise ValueError('Only single index/column triangles are ',
                              'supported')
+        incr = X.cum_to_incr().values[0, 0]
         unscaled_residuals = \
-            ((X.cum_to_incr().values - exp_incr_triangle) /
-             xp.sqrt(xp.abs(exp_incr_triangle**k_value)))[0, 0, ...]
+            ((incr - exp_incr_triangle) /
+             xp.sqrt(xp.abs(exp_incr_triangle**k_value)))
+        if X.values.dtype == xp.float32:
+            # Single precision residuals within rounding of the cumulative
+            # amounts are exact fits and are excluded below like any other
+            # zero residual
+            exact = xp.abs(incr - exp_incr_triangle) <= \
+                4 * xp.finfo(X.values.dtype).eps * xp.abs(X.values[0, 0])
+            unscaled_residuals = unscaled_residuals * ~exact
         w_ = self.w_[0, 0]
         w_[:, 1:]*w_[:, 1:]
         w_ = xp.concatenate((w_[:, 0:1], w_), axis=1)
@@ -121,11 +129,17 @@ class BootstrapODPSample(DevelopmentBase):
         # He also adjusts the residuals for the hetero adjustment
         scale_phi = pearson_chi_sq / degree_freedom
         k, v, o, d = X.shape
-        resids = xp.reshape(standardized_residuals, (k, v, o*d))
+        # The hat matrix is solved in double precision, but simulations are
+        # carried out in the precision of X
+        resids = xp.reshape(standardized_residuals, (k, v, o*d)) \
+                   .astype(X.values.dtype, copy=False)
 
         adj_resid_dist = resids[xp.isfinite(resids)]  # Missing k,v dimensions
         # Suggestions from Using the ODP Bootstrap Model: A Practitioners Guide
         adj_resid_dist = adj_resid_dist[adj_resid_dist != 0]
+        if len(adj_resid_dist) == 0:
+            # A triangle fit exactly by the chainladder has nothing to resample
+            adj_resid_dist = xp.zeros(1, dtype=X.values.dtype)
         adj_resid_dist = adj_resid_dist - xp.mean(adj_resid_dist)
         random_state = xp.random.RandomState(self.random_state)
         resampled_residual = [xp.expand_dims(random_state.choice(adj_resid_dist,
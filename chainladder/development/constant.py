@@ -52,14 +52,15 @@ class DevelopmentConstant(DevelopmentBase):
         """
         obj = copy.copy(X)
         xp = cp.get_array_module(obj.values)
-        obj.values = xp.ones(X.shape)[..., :-1]
+        obj.values = xp.ones(X.shape[:2] + (1, X.shape[-1] - 1))
+        obj.odims = X.odims[:1]
         ldf = xp.array([float(self.patterns[item]) for item in obj.ddims[:-1]])
         if self.style == 'cdf':
             ldf = xp.concatenate((ldf[:-1]/ldf[1:], xp.array([ldf[-1]])))
         ldf = ldf[xp.newaxis, xp.newaxis, xp.newaxis, ...]
         obj.values = obj.values * ldf
         obj.ddims = X.link_ratio.ddims
-        obj.valuation = obj._valuation_triangle(obj.ddims)
+        obj._reset_valuation(obj.ddims)
         obj.nan_override = True
         obj._set_slicers()
 
@@ -54,6 +54,8 @@ class MunichAdjustment(BaseEstimator, TransformerMixin, EstimatorIO):
         self.residual_, self.q_resid_ = self._get_MCL_residuals(obj)
         self.lambda_coef_ = self._get_MCL_lambda()
         self.cdf_ = self._get_cdf(obj)
+        self.sigma_ = self._expand_origin(obj.sigma_, obj)
+        self.std_err_ = self._expand_origin(obj.std_err_, obj)
         return self
 
     def transform(self, X):
@@ -71,8 +73,22 @@ class MunichAdjustment(BaseEstimator, TransformerMixin, EstimatorIO):
         """
         X.cdf_ = self.cdf_
         X.ldf_ = self.ldf_
+        X.sigma_ = self.sigma_
+        X.std_err_ = self.std_err_
         return X
 
+    @staticmethod
+    def _expand_origin(obj, X):
+        ''' Repeats a single origin pattern across the origins of X, as the
+            Munich adjusted patterns vary by origin '''
+        obj = copy.deepcopy(obj)
+        xp = cp.get_array_module(obj.values)
+        obj.values = xp.repeat(obj.values, len(X.odims) // obj.shape[-2], -2)
+        obj.odims = X.odims
+        obj._reset_valuation()
+        obj._set_slicers()
+        return obj
+
     def _get_p_to_i_object(self, obj):
         xp = cp.get_array_module(obj.values)
         paid = obj[list(self.paid_to_incurred.keys())[0]]
@@ -106,8 +122,6 @@ class MunichAdjustment(BaseEstimator, TransformerMixin, EstimatorIO):
         p_to_i_ldf = self.p_to_i_ldf_
         p_to_i_sigma = self.p_to_i_sigma_
         paid, incurred = self.p_to_i_X_[0], self.p_to_i_X_[1]
-        p_to_i_ldf = xp.unique(p_to_i_ldf, axis=-2)  # May cause issues later
-        p_to_i_sigma = xp.unique(p_to_i_sigma, axis=-2)  # May cause issues
         residualP = (p_to_i_ata[0]-p_to_i_ldf[0]) / \
             p_to_i_sigma[0]*xp.sqrt(paid[..., :-1, :-1])
         residualI = (p_to_i_ata[1]-p_to_i_ldf[1]) / \
@@ -168,8 +182,7 @@ class MunichAdjustment(BaseEstimator, TransformerMixin, EstimatorIO):
         ''' needs to be an attribute that gets assigned.  requires we overwrite
             the cdf and ldf methods with
         '''
-        obj = copy.copy(X.cdf_)
-        xp = cp.get_array_module(obj.values)
+        obj = self._expand_origin(X.cdf_, X)
         cdf_triangle = self.munich_full_triangle_
         cdf_triangle = cdf_triangle[..., -1:]/cdf_triangle[..., :-1]
         paid = list(self.paid_to_incurred.keys())
@@ -60,19 +60,8 @@ class MethodBase(BaseEstimator, EstimatorIO):
 
         """
         obj = copy.copy(self)
-        xp = cp.get_array_module(X.values)
         obj.X_ = copy.copy(X)
         obj.sample_weight = sample_weight
-        if xp.unique(self.cdf_.values, axis=-2).shape[-2] == 1:
-            obj.cdf_.values = xp.repeat(
-                xp.unique(self.cdf_.values, axis=-2),
-                len(X.odims), -2)
-            obj.ldf_.values = xp.repeat(
-                xp.unique(self.ldf_.values, axis=-2),
-                len(X.odims), -2)
-            obj.cdf_.odims = obj.ldf_.odims = obj.X_.odims
-            obj.cdf_.valuation = obj.ldf_.valuation = \
-                Development().fit(X).cdf_.valuation
         obj.cdf_._set_slicers()
         obj.ldf_._set_slicers()
         return obj
@@ -81,13 +70,12 @@ class MethodBase(BaseEstimator, EstimatorIO):
     def full_expectation_(self):
         obj = copy.copy(self.X_)
         xp = cp.get_array_module(obj.values)
-        obj.values = (self.ultimate_.values /
-                      xp.unique(self.cdf_.values, axis=-2))
+        obj.values = self.ultimate_.values / self.cdf_.values
         obj.values = xp.concatenate((obj.values,
                                     self.ultimate_.values), -1)
         ddims = [int(item[item.find('-')+1:]) for item in self.ldf_.ddims]
         obj.ddims = np.array([obj.ddims[0]]+ddims)
-        obj.valuation = obj._valuation_triangle(obj.ddims)
+        obj._reset_valuation(obj.ddims)
         obj.valuation_date = max(obj.valuation)
         obj.nan_override = True
         obj.values[obj.values == 0] = xp.nan
@@ -107,12 +95,12 @@ class MethodBase(BaseEstimator, EstimatorIO):
         xp = cp.get_array_module(obj.values)
         w = 1-xp.nan_to_num(obj._nan_triangle())
         extend = len(self.ldf_.ddims) - len(self.X_.ddims)
-        ones = xp.ones((w.shape[-2], extend))
+        ones = xp.ones((w.shape[-2], extend), dtype=obj.values.dtype)
         w = xp.concatenate((w, ones), -1)
         obj.nan_override = True
         e_tri = \
             xp.repeat(self.ultimate_.values, self.cdf_.values.shape[3], 3) / \
-            xp.unique(self.cdf_.values, axis=-2)
+            self.cdf_.values
         e_tri = e_tri * w
         zeros = obj._expand_dims(ones - ones)
         properties = self.full_expectation_
@@ -71,9 +71,6 @@ class Benktander(MethodBase):
         if sample_weight is None:
             raise ValueError('sample_weight is required.')
         super().fit(X, y, sample_weight)
-        if hasattr(X, '_get_process_variance'):
-            if X.shape[0] != sample_weight.shape[0]:
-                sample_weight = sample_weight.broadcast_axis('index', X.index)
         obj = copy.deepcopy(self)
         self.sample_weight_ = sample_weight
         self.ultimate_ = self._get_ultimate_(X, sample_weight, obj)
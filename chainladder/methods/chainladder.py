@@ -89,12 +89,9 @@ class Chainladder(MethodBase):
                                self.cdf_.shape[development], development)
         cdf = self.cdf_.values[..., :nans.shape[development]]
         obj_tri = obj.values[..., :nans.shape[development]]
-        if xp.unique(cdf, axis=2).shape[2] == 1 and \
-           len(obj.odims) != cdf.shape[2]:
-            cdf = xp.repeat(xp.unique(cdf, axis=2), len(obj.odims), axis=2)
         obj.values = (cdf*obj_tri)*nans
         obj = obj.latest_diagonal
         obj.ddims = np.array([None])
-        obj.valuation = obj._valuation_triangle()
+        obj._reset_valuation()
         obj._set_slicers()
         return obj
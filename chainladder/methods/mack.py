@@ -73,13 +73,14 @@ class MackChainladder(Chainladder):
         weight_dict = {'regression': 0, 'volume': 1, 'simple': 2}
         avg = list(self.average_) if type(self.average_) is not list else self.average_
         val = xp.array([weight_dict.get(item.lower(), 2)
-                        for item in avg + [avg[-1]]])
+                        for item in avg + [avg[-1]]], dtype=tri_array.dtype)
         val = xp.broadcast_to(val, self.X_.shape)
         weight = xp.sqrt(tri_array[..., :len(self.X_.ddims)]**(2-val))
         weight[weight == 0] = xp.nan
         obj.values = self.X_.sigma_.values / weight
         w = xp.concatenate(
-            (self.X_.w_, xp.ones((*val.shape[:3], 1))*xp.nan), axis=3)
+            (self.X_.w_, xp.full((*val.shape[:3], 1), xp.nan,
+                                 dtype=self.X_.w_.dtype)), axis=3)
         w[xp.isnan(w)] = 1
         obj.values = xp.nan_to_num(obj.values) * w
         obj.nan_override = True
@@ -101,9 +102,10 @@ class MackChainladder(Chainladder):
         obj = copy.copy(self.X_)
         xp = cp.get_array_module(obj.values)
         nans = self.X_._nan_triangle()[xp.newaxis, xp.newaxis]
-        nans = nans * xp.ones(self.X_.shape)
+        nans = xp.broadcast_to(nans, self.X_.shape)
         nans = xp.concatenate(
-            (nans, xp.ones((*self.X_.shape[:3], 1))*xp.nan), 3)
+            (nans, xp.full((*self.X_.shape[:3], 1), xp.nan,
+                           dtype=nans.dtype)), 3)
         nans = 1-xp.nan_to_num(nans)
         properties = self.full_triangle_
         obj.valuation = properties.valuation
@@ -111,7 +113,8 @@ class MackChainladder(Chainladder):
             (properties.ddims[:len(self.X_.ddims)],
             np.array([properties.ddims[-1]])))
         obj.nan_override = True
-        risk_arr = xp.zeros((*self.X_.shape[:3], 1))
+        risk_arr = xp.zeros((*self.X_.shape[:3], 1),
+                            dtype=self.X_.values.dtype)
         if est == 'param_risk':
             obj.values = self._get_risk(nans, risk_arr,
                                         obj.std_err_.values)
@@ -148,16 +151,21 @@ class MackChainladder(Chainladder):
     def _get_tot_param_risk(self, risk_arr):
         """ This assumes triangle symmertry """
         xp = cp.get_array_module(self.full_triangle_.values)
-        t1 = xp.nan_to_num(self.full_triangle_.values)[..., :len(self.X_.ddims)] - \
+        proj = xp.nan_to_num(self.full_triangle_.values)[..., :len(self.X_.ddims)] - \
             xp.nan_to_num(self.X_.values) + \
             xp.nan_to_num(self.X_._get_latest_diagonal(False).values)
-        t1 = xp.sum(t1*self.X_.std_err_.values, axis=2, keepdims=True)
+        t1 = xp.sum(proj*self.X_.std_err_.values, axis=2, keepdims=True)
         extend = self.X_.ldf_.shape[-1]-self.X_.shape[-1]+1
         ldf = self.X_.ldf_.values[..., :len(self.X_.ddims)-1]
         ldf = xp.concatenate(
             (ldf, xp.prod(self.X_.ldf_.values[..., -extend:], -1,
              keepdims=True)), -1)
-        ldf = xp.unique(ldf, axis=-2)
+        if ldf.shape[2] > 1:
+            # Patterns varying by origin, such as Munich adjusted patterns,
+            # develop the total by their average weighted by the same
+            # projected losses that weight the standard errors in t1
+            ldf = xp.sum(ldf*proj, 2, keepdims=True) / \
+                xp.sum(proj, 2, keepdims=True)
         for i in range(self.full_triangle_.shape[-1]-1):
             t_tot = xp.sqrt((t1[..., i:i+1])**2 + (ldf[..., i:i+1] *
                             risk_arr[..., -1:])**2)
@@ -28,3 +28,15 @@ def test_bf_eq_cl_when_using_cl_apriori():
                                           sample_weight=cl_ult).ultimate_
     xp = cp.get_array_module(cl_ult.values)
     xp.testing.assert_allclose(cl_ult.values, bf_ult.values, atol=1e-5)
+
+
+def test_unbroadcast_exposure():
+    raa = cl.load_dataset('raa')
+    sims = cl.BootstrapODPSample(n_sims=50, random_state=42).fit_transform(raa)
+    exposure = raa.latest_diagonal * 0 + 20000
+    model = cl.Benktander(apriori=.8, n_iters=2, apriori_sigma=.1,
+                          random_state=42)
+    a = model.fit(sims, sample_weight=exposure).ultimate_
+    b = model.fit(sims, sample_weight=exposure.broadcast_axis(
+        'index', sims.index)).ultimate_
+    assert a.shape == sims.latest_diagonal.shape and a == b
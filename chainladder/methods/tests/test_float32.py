@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+import chainladder as cl
+
+datasets = ['abc', 'auto', 'cc_sample', 'clrd', 'genins', 'ia_sample', 'liab',
+            'm3ir5', 'mcl', 'mortgage', 'mw2008', 'mw2014', 'quarterly',
+            'raa', 'tail_sample', 'ukmotor', 'usaa', 'usauto']
+# Triangles with cells fit exactly by the chainladder, whose double precision
+# residuals are rounding noise that can differ between runs
+exact_fits = ['genins', 'mw2008', 'quarterly', 'tail_sample']
+
+
+def assert_close(a, b, scale=None, rtol=1e-5):
+    ''' Bounds the normwise relative error of a float32 result against its
+        float64 counterpart '''
+    assert a.dtype == np.float32
+    a, b = np.asarray(a, dtype='float64'), np.asarray(b)
+    # Divergent extrapolations overflow float32 and are not compared
+    valid = ~(np.abs(b) > np.finfo(np.float32).max)
+    a, b = np.nan_to_num(a[valid]), np.nan_to_num(b[valid])
+    scale = np.max(np.abs(b), initial=0) if scale is None else scale
+    assert np.max(np.abs(a - b), initial=0) <= rtol * scale
+
+
+@pytest.fixture(params=datasets)
+def tri(request):
+    tri = cl.load_dataset(request.param)
+    if tri.shape[0] > 1:
+        # Individual companies can be too sparse to be well conditioned
+        tri = tri.groupby(tri.key_labels[-1]).sum()
+    return tri
+
+
+def test_development_float32(tri):
+    a = cl.Development().fit(tri.astype('float32'))
+    b = cl.Development().fit(tri)
+    assert_close(a.ldf_.values, b.ldf_.values)
+    assert_close(a.cdf_.values, b.cdf_.values)
+    # Standard errors are on the scale of the ldfs and sigmas on the scale of
+    # the ldfs times the root of the losses
+    scale = np.nanmax(np.abs(b.ldf_.values))
+    assert_close(a.std_err_.values, b.std_err_.values, scale)
+    scale = scale * np.sqrt(np.nanmax(np.abs(tri.values)))
+    assert_close(a.sigma_.values, b.sigma_.values, scale)
+
+
+@pytest.mark.parametrize('tail', [
+    cl.TailConstant(1.05, decay=0.8), cl.TailCurve('exponential'),
+    cl.TailCurve('inverse_power')])
+def test_tail_float32(tri, tail):
+    a = tail.fit(tri.astype('float32')).cdf_.values
+    b = tail.fit(tri).cdf_.values
+    assert_close(a, b)
+
+
+def test_bondy_float32(tri):
+    tri = tri.iloc[-1, 0]
+    a = cl.TailBondy().fit(tri.astype('float32')).cdf_.values
+    b = cl.TailBondy().fit(tri).cdf_.values
+    assert_close(a, b)
+
+
+def test_chainladder_float32(tri):
+    a = cl.Chainladder().fit(tri.astype('float32'))
+    b = cl.Chainladder().fit(tri)
+    assert_close(a.ultimate_.values, b.ultimate_.values)
+    assert_close(a.full_triangle_.values, b.full_triangle_.values)
+
+
+def test_mack_float32(tri):
+    a = cl.MackChainladder().fit(tri.astype('float32'))
+    b = cl.MackChainladder().fit(tri)
+    # Standard errors are bounded relative to the size of the reserves
+    scale = np.nanmax(np.abs(b.ultimate_.values))
+    assert_close(a.ultimate_.values, b.ultimate_.values)
+    assert_close(a.mack_std_err_.values, b.mack_std_err_.values, scale)
+
+
+def test_bootstrap_float32(tri, request):
+    if request.node.callspec.params['tri'] in exact_fits:
+        pytest.skip('Only single precision drops rounding noise residuals')
+    tri = tri.iloc[-1, 0]
+    a = cl.BootstrapODPSample(n_sims=100, random_state=42) \
+          .fit(tri.astype('float32')).resampled_triangles_.values
+    b = cl.BootstrapODPSample(n_sims=100, random_state=42) \
+          .fit(tri).resampled_triangles_.values
+    # Residuals are small differences of cumulative amounts
+    assert_close(a, b, rtol=1e-3)
@@ -1,4 +1,6 @@
 import chainladder as cl
+import copy
+import numpy as np
 raa = cl.load_dataset('RAA')
 raa_1989 = raa[raa.valuation < raa.valuation_date]
 cl_ult = cl.Chainladder().fit(raa).ultimate_  # Chainladder Ultimate
@@ -25,3 +27,36 @@ def test_bs_random_state_predict():
     X = cl.BootstrapODPSample(random_state=100).fit_transform(tri['CumPaidLoss'])
     bf = cl.BornhuetterFerguson(apriori=0.6, apriori_sigma=0.1, random_state=42).fit(X, sample_weight=tri['EarnedPremNet'].latest_diagonal)
     assert bf.predict(X, sample_weight=tri['EarnedPremNet'].latest_diagonal).ibnr_ == bf.ibnr_
+
+
+def test_patterns_broadcast_on_predict():
+    model = cl.Chainladder().fit(raa)
+    assert model.ldf_.shape[-2] == model.cdf_.shape[-2] == 1
+    recent = raa[raa.origin >= '1985']
+    assert model.predict(recent).ultimate_ == \
+        model.ultimate_[model.ultimate_.origin >= '1985']
+
+
+def test_munich_patterns():
+    dev = cl.Development().fit_transform(cl.load_dataset('mcl'))
+    munich = cl.MunichAdjustment(
+        paid_to_incurred={'paid': 'incurred'}).fit_transform(dev)
+    assert len(munich.cdf_.valuation) == np.prod(munich.cdf_.shape[-2:])
+    cl.Chainladder().fit(munich)
+    cl.MackChainladder().fit(munich).summary_
+
+
+def test_mack_origin_patterns_reduce_to_mack():
+    # Origin varying patterns that happen to agree give the usual Mack errors
+    for name in ['raa', 'abc', 'genins']:
+        dev = cl.Development().fit_transform(cl.load_dataset(name))
+        expanded = copy.deepcopy(dev)
+        for item in ['ldf_', 'cdf_', 'sigma_', 'std_err_']:
+            setattr(expanded, item, cl.MunichAdjustment._expand_origin(
+                getattr(dev, item), dev))
+        a, b = cl.MackChainladder().fit(expanded), cl.MackChainladder().fit(dev)
+        assert a.total_parameter_risk_.shape == b.total_parameter_risk_.shape
+        np.testing.assert_allclose(a.total_mack_std_err_.values,
+                                   b.total_mack_std_err_.values)
+        np.testing.assert_allclose(np.nan_to_num(a.mack_std_err_.values),
+                                   np.nan_to_num(b.mack_std_err_.values))
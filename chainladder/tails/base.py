@@ -25,12 +25,13 @@ class TailBase(BaseEstimator, TransformerMixin, EstimatorIO):
             (obj.ddims, [(item+1)*self._ave_period[1] + obj.ddims[-1]
                          for item in range(self._ave_period[0])], [9999]), 0)
         self.ldf_ = copy.copy(obj.ldf_)
-        tail = xp.ones(self.ldf_.shape)[..., -1:]
+        tail = xp.ones(self.ldf_.shape,
+                       dtype=self.ldf_.values.dtype)[..., -1:]
         tail = xp.repeat(tail, self._ave_period[0]+1, -1)
         self.ldf_.values = xp.concatenate((self.ldf_.values, tail), -1)
         self.ldf_.ddims = np.array(['{}-{}'.format(ddims[i], ddims[i+1])
                                     for i in range(len(ddims)-1)])
-        self.ldf_.valuation = self.ldf_._valuation_triangle()
+        self.ldf_._reset_valuation()
         self.sigma_ = copy.copy(getattr(obj, 'sigma_', obj.cdf_*0))
         self.std_err_ = copy.copy(getattr(obj, 'std_err_', obj.cdf_*0))
         zeros = tail[..., -1:]*0
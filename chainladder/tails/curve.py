@@ -67,7 +67,7 @@ class TailCurve(TailBase):
         super().fit(X, y, sample_weight)
         xp = cp.get_array_module(self.ldf_.values)
         _y = self.ldf_.values[..., :X.shape[-1]-1].copy()
-        _w = xp.zeros(_y.shape)
+        _w = xp.zeros(_y.shape, dtype=_y.dtype)
         if type(self.fit_period) is not slice:
             raise TypeError('fit_period must be slice.')
         else:
@@ -87,7 +87,7 @@ class TailCurve(TailBase):
         slope, intercept = coefs.slope_, coefs.intercept_
         extrapolate = xp.cumsum(
             xp.ones(tuple(list(_y.shape)[:-1] +
-                    [self.extrap_periods + n_obs])), -1)
+                    [self.extrap_periods + n_obs]), dtype=_y.dtype), -1)
         tail = self._predict_tail(slope, intercept, extrapolate)
         if self.attachment_age:
             attach_idx = xp.min(xp.where(X.ddims>=self.attachment_age))
@@ -88,7 +88,7 @@ def read_json(json_str, array_backend=None):
         tri.valuation_date = pd.to_datetime(
             json_dict['valuation_date'], format='%Y-%m-%d').to_period('M').to_timestamp(how='e')
         tri._set_slicers()
-        tri.valuation = tri._valuation_triangle()
+        tri._reset_valuation()
         if json_dict['values'].get('sparse', None):
             tri.values = sparse_in(json_dict['values']['array'],
                                    json_dict['values']['dtype'], shape)
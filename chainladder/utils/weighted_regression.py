@@ -5,6 +5,20 @@ import numpy as np
 from chainladder.utils.cupy import cp
 from sklearn.base import BaseEstimator
 
+
+def _nansum(a, axis):
+    ''' nansum accumulated in double precision and returned in the dtype of
+        ``a`` so that float32 triangles don't lose accuracy in reductions. '''
+    xp = cp.get_array_module(a)
+    return xp.nansum(a, axis, dtype='float64').astype(a.dtype, copy=False)
+
+
+def _nanmean(a, axis):
+    ''' nanmean counterpart of ``_nansum`` '''
+    xp = cp.get_array_module(a)
+    return xp.nanmean(a, axis, dtype='float64').astype(a.dtype, copy=False)
+
+
 class WeightedRegression(BaseEstimator):
     ''' Helper class that fits a system of regression equations
         simultaneously on a multi-dimensional array.  Look into
@@ -17,9 +31,10 @@ class WeightedRegression(BaseEstimator):
     def infer_x_w(self):
         xp = cp.get_array_module(self.y)
         if self.w is None:
-            self.w = xp.ones(self.y.shape)
+            self.w = xp.ones(self.y.shape, dtype=self.y.dtype)
         if self.x is None:
-            self.x = xp.cumsum(xp.ones(self.y.shape), self.axis)
+            self.x = xp.cumsum(
+                xp.ones(self.y.shape, dtype=self.y.dtype), self.axis)
         return self
 
     def fit(self, X, y=None, sample_weight=None):
@@ -45,9 +60,9 @@ class WeightedRegression(BaseEstimator):
         x[w == 0] = xp.nan
         y[w == 0] = xp.nan
         slope = (
-            (xp.nansum(w*x*y, axis)-xp.nansum(x*w, axis)*xp.nanmean(y, axis)) /
-            (xp.nansum(w*x*x, axis)-xp.nanmean(x, axis)*xp.nansum(w*x, axis)))
-        intercept = xp.nanmean(y, axis) - slope * xp.nanmean(x, axis)
+            (_nansum(w*x*y, axis)-_nansum(x*w, axis)*_nanmean(y, axis)) /
+            (_nansum(w*x*x, axis)-_nanmean(x, axis)*_nansum(w*x, axis)))
+        intercept = _nanmean(y, axis) - slope * _nanmean(x, axis)
         self.slope_ = xp.expand_dims(slope, -1)
         self.intercept_ = xp.expand_dims(intercept, -1)
         return self
@@ -55,16 +70,16 @@ class WeightedRegression(BaseEstimator):
     def _fit_OLS_thru_orig(self):
         w, x, y, axis = self.w, self.x, self.y, self.axis
         xp = cp.get_array_module(x)
-        coef = xp.nansum(w*x*y, axis)/xp.nansum((y*0+1)*w*x*x, axis)
+        coef = _nansum(w*x*y, axis)/_nansum((y*0+1)*w*x*x, axis)
         fitted_value = xp.repeat(xp.expand_dims(coef, axis),
                                  x.shape[axis], axis)
         fitted_value = (fitted_value*x*(y*0+1))
         residual = (y-fitted_value)*xp.sqrt(w)
-        wss_residual = xp.nansum(residual**2, axis)
-        mse_denom = xp.nansum((y*0+1)*(w!=0), axis)-1
+        wss_residual = _nansum(residual**2, axis)
+        mse_denom = _nansum((y*0+1)*(w!=0), axis)-1
         mse_denom[mse_denom == 0] = xp.nan
         mse = wss_residual / mse_denom
-        std_err = xp.sqrt(mse/xp.nansum(w*x*x*(y*0+1), axis))
+        std_err = xp.sqrt(mse/_nansum(w*x*x*(y*0+1), axis))
         std_err = xp.expand_dims(std_err, -1)
         std_err[std_err == 0] = xp.nan
         coef = xp.expand_dims(coef, -1)
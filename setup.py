@@ -32,7 +32,6 @@ setup(
         "numpy>=1.12.0",
         "scikit-learn>=0.18.0",
         "scipy",
-        "sparse",
         "joblib",
         'xlcompose'
     ],